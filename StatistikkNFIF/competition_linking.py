@@ -9,6 +9,7 @@ This module provides tools to:
 Usage:
     python competition_linking.py analyze      # Analyze competition patterns
     python competition_linking.py group        # Auto-group competitions
+    python competition_linking.py group --fuzzy  # ... also merging near-identical names
     python competition_linking.py search "NM"  # Find competitions by name
     python competition_linking.py show 123     # Show all results for a meet
 """
@@ -16,23 +17,72 @@ Usage:
 import sqlite3
 import re
 import sys
-from collections import defaultdict
+from collections import Counter, defaultdict
 from datetime import datetime, timedelta
 
 DB_PATH = "athletics_stats.db"
 
+# Applied to every new connection: WAL + relaxed fsync for write-heavy grouping,
+# 64MB page cache and mmap I/O for the large analytic scans
+CONNECTION_PRAGMAS = """
+    PRAGMA journal_mode = WAL;
+    PRAGMA synchronous = NORMAL;
+    PRAGMA cache_size = -65536;
+    PRAGMA temp_store = MEMORY;
+    PRAGMA mmap_size = 2147483648;
+    PRAGMA busy_timeout = 5000;
+"""
+
+YEAR_RE = re.compile(r'(19|20)\d{2}')
+DIGITS_RE = re.compile(r'\d+')
+LOCATION_PREFIX_RE = re.compile(r'^[^,]+,\s*')
+
+# Trigram full-text search needs at least this many characters; shorter
+# queries fall back to LIKE
+FTS_MIN_QUERY_LENGTH = 3
+
+# Minimum rapidfuzz ratio (0-100) for two names to count as the same
+FUZZY_SCORE_CUTOFF = 90
+
+# (pattern, championship type), checked in order - first match wins
+CHAMPIONSHIP_PATTERNS = tuple(
+    (re.compile(pattern, re.IGNORECASE), champ_type)
+    for pattern, champ_type in (
+        (r'\bNM\b', 'NM'),           # Norgesmesterskap
+        (r'\bUM\b', 'UM'),           # Ungdomsmesterskap
+        (r'\bKM\b', 'KM'),           # Kretsmesterskap
+        (r'\bEM\b', 'EM'),           # Europamesterskap
+        (r'\bVM\b', 'VM'),           # Verdensmesterskap
+        (r'\bOL\b', 'OL'),           # Olympiske Leker
+        (r'norgesmesterskap', 'NM'),
+        (r'ungdomsmesterskap', 'UM'),
+        (r'europamesterskap', 'EM'),
+        (r'diamond\s*league', 'Diamond League'),
+        (r'bislett\s*games', 'Bislett Games'),
+    )
+)
+
 
 def get_connection():
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
+    conn.executescript(CONNECTION_PRAGMAS)
     return conn
 
 
+def close_connection(conn):
+    """Let SQLite refresh its planner statistics, then close"""
+    conn.execute("PRAGMA optimize")
+    conn.close()
+
+
 def init_competition_groups():
     """Create the competition_groups table for linking related competitions"""
     conn = get_connection()
     cursor = conn.cursor()
 
+    migrate_links_without_rowid(cursor)
+
     cursor.executescript("""
         -- A "meet" is a logical grouping of competitions (e.g., "NM 2023" spanning multiple days)
         CREATE TABLE IF NOT EXISTS meets (
@@ -50,18 +100,26 @@ def init_competition_groups():
         );
 
         -- Link table connecting competitions to meets
+        -- WITHOUT ROWID: the primary key is the clustered index, so a lookup by
+        -- competition_id is a single B-tree descent
         CREATE TABLE IF NOT EXISTS competition_meet_links (
             competition_id INTEGER NOT NULL REFERENCES competitions(id),
             meet_id INTEGER NOT NULL REFERENCES meets(id),
             confidence REAL DEFAULT 1.0,     -- How confident we are in this link (1.0 = manual, <1 = auto)
             created_at TEXT DEFAULT (datetime('now')),
             PRIMARY KEY (competition_id, meet_id)
-        );
+        ) WITHOUT ROWID;
 
         CREATE INDEX IF NOT EXISTS idx_meets_year ON meets(year);
         CREATE INDEX IF NOT EXISTS idx_meets_name ON meets(name);
-        CREATE INDEX IF NOT EXISTS idx_comp_meet_links_meet ON competition_meet_links(meet_id);
-        CREATE INDEX IF NOT EXISTS idx_comp_meet_links_comp ON competition_meet_links(competition_id);
+
+        -- Covering index for meet -> competitions lookups (supersedes the meet_id-only index)
+        DROP INDEX IF EXISTS idx_comp_meet_links_meet;
+        CREATE INDEX IF NOT EXISTS idx_cml_meet_comp ON competition_meet_links(meet_id, competition_id);
+
+        -- Per-competition counts/joins on results (not in the original schema.sql)
+        CREATE INDEX IF NOT EXISTS idx_results_competition ON results(competition_id);
+        CREATE INDEX IF NOT EXISTS idx_results_comp_event_num ON results(competition_id, event_id, result_numeric);
 
         -- View: All results with meet information
         CREATE VIEW IF NOT EXISTS results_with_meets AS
@@ -86,13 +144,123 @@ def init_competition_groups():
         LEFT JOIN venues v ON c.venue_id = v.id
         LEFT JOIN competition_meet_links cml ON c.id = cml.competition_id
         LEFT JOIN meets m ON cml.meet_id = m.id;
+
+        -- View: Results linked to a meet, without the name lookups (for counts/aggregates)
+        CREATE VIEW IF NOT EXISTS meet_results AS
+        SELECT
+            cml.meet_id,
+            r.*
+        FROM competition_meet_links cml
+        JOIN results r ON r.competition_id = cml.competition_id;
+    """)
+
+    init_search_index(cursor)
+
+    # Championship flag on competitions, maintained from extract_meet_info
+    columns = [row['name'] for row in cursor.execute("PRAGMA table_info(competitions)")]
+    if 'is_championship' not in columns:
+        cursor.execute("ALTER TABLE competitions ADD COLUMN is_championship INTEGER")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_comp_champ ON competitions(year DESC, date DESC)
+        WHERE is_championship = 1
     """)
+    backfill_championship_flags(conn)
 
     conn.commit()
-    conn.close()
+    close_connection(conn)
     print("Competition groups tables created.")
 
 
+def migrate_links_without_rowid(cursor):
+    """Rebuild a competition_meet_links table created before it was WITHOUT ROWID"""
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'competition_meet_links'")
+    row = cursor.fetchone()
+    if not row or 'WITHOUT ROWID' in row[0].upper():
+        return
+
+    # The views are recreated by init_competition_groups; dropping them first keeps
+    # the rename from being rejected over their references to the old table
+    cursor.executescript("""
+        BEGIN;
+        DROP VIEW IF EXISTS results_with_meets;
+        DROP VIEW IF EXISTS meet_results;
+        CREATE TABLE competition_meet_links_new (
+            competition_id INTEGER NOT NULL REFERENCES competitions(id),
+            meet_id INTEGER NOT NULL REFERENCES meets(id),
+            confidence REAL DEFAULT 1.0,
+            created_at TEXT DEFAULT (datetime('now')),
+            PRIMARY KEY (competition_id, meet_id)
+        ) WITHOUT ROWID;
+        INSERT INTO competition_meet_links_new (competition_id, meet_id, confidence, created_at)
+            SELECT competition_id, meet_id, confidence, created_at FROM competition_meet_links;
+        DROP TABLE competition_meet_links;
+        ALTER TABLE competition_meet_links_new RENAME TO competition_meet_links;
+        COMMIT;
+    """)
+    print("Rebuilt competition_meet_links as WITHOUT ROWID.")
+
+
+def init_search_index(cursor):
+    """
+    Create trigram FTS5 indexes over competition and meet names, kept in sync by
+    triggers. Trigram tokens keep the substring semantics of LIKE '%query%'.
+    """
+    cursor.execute("SELECT name FROM sqlite_master WHERE name IN ('competitions_fts', 'meets_fts')")
+    existing = {row[0] for row in cursor.fetchall()}
+
+    cursor.executescript("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS competitions_fts USING fts5(
+            name, content='competitions', content_rowid='id', tokenize='trigram'
+        );
+
+        CREATE TRIGGER IF NOT EXISTS competitions_fts_insert AFTER INSERT ON competitions BEGIN
+            INSERT INTO competitions_fts(rowid, name) VALUES (new.id, new.name);
+        END;
+        CREATE TRIGGER IF NOT EXISTS competitions_fts_delete AFTER DELETE ON competitions BEGIN
+            INSERT INTO competitions_fts(competitions_fts, rowid, name) VALUES ('delete', old.id, old.name);
+        END;
+        CREATE TRIGGER IF NOT EXISTS competitions_fts_update AFTER UPDATE OF name ON competitions BEGIN
+            INSERT INTO competitions_fts(competitions_fts, rowid, name) VALUES ('delete', old.id, old.name);
+            INSERT INTO competitions_fts(rowid, name) VALUES (new.id, new.name);
+        END;
+
+        CREATE VIRTUAL TABLE IF NOT EXISTS meets_fts USING fts5(
+            name, short_name, content='meets', content_rowid='id', tokenize='trigram'
+        );
+
+        CREATE TRIGGER IF NOT EXISTS meets_fts_insert AFTER INSERT ON meets BEGIN
+            INSERT INTO meets_fts(rowid, name, short_name) VALUES (new.id, new.name, new.short_name);
+        END;
+        CREATE TRIGGER IF NOT EXISTS meets_fts_delete AFTER DELETE ON meets BEGIN
+            INSERT INTO meets_fts(meets_fts, rowid, name, short_name)
+            VALUES ('delete', old.id, old.name, old.short_name);
+        END;
+        CREATE TRIGGER IF NOT EXISTS meets_fts_update AFTER UPDATE OF name, short_name ON meets BEGIN
+            INSERT INTO meets_fts(meets_fts, rowid, name, short_name)
+            VALUES ('delete', old.id, old.name, old.short_name);
+            INSERT INTO meets_fts(rowid, name, short_name) VALUES (new.id, new.name, new.short_name);
+        END;
+    """)
+
+    # Index rows that existed before the FTS tables did
+    if 'competitions_fts' not in existing:
+        cursor.execute("INSERT INTO competitions_fts(competitions_fts) VALUES ('rebuild')")
+    if 'meets_fts' not in existing:
+        cursor.execute("INSERT INTO meets_fts(meets_fts) VALUES ('rebuild')")
+
+
+def backfill_championship_flags(conn):
+    """Set competitions.is_championship for rows that have not been classified yet"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, name FROM competitions WHERE is_championship IS NULL")
+    updates = [
+        (1 if extract_meet_info(row['name'] or '')['is_championship'] else 0, row['id'])
+        for row in cursor.fetchall()
+    ]
+    cursor.executemany("UPDATE competitions SET is_championship = ? WHERE id = ?", updates)
+    conn.commit()
+
+
 def extract_meet_info(competition_name: str) -> dict:
     """Extract structured info from a competition name"""
     info = {
@@ -103,40 +271,85 @@ def extract_meet_info(competition_name: str) -> dict:
     }
 
     # Extract year
-    year_match = re.search(r'(19|20)\d{2}', competition_name)
+    year_match = YEAR_RE.search(competition_name)
     if year_match:
         info['year'] = int(year_match.group())
 
     # Identify championships
-    name_lower = competition_name.lower()
-
-    championship_patterns = [
-        (r'\bNM\b', 'NM', True),           # Norgesmesterskap
-        (r'\bUM\b', 'UM', True),           # Ungdomsmesterskap
-        (r'\bKM\b', 'KM', True),           # Kretsmesterskap
-        (r'\bEM\b', 'EM', True),           # Europamesterskap
-        (r'\bVM\b', 'VM', True),           # Verdensmesterskap
-        (r'\bOL\b', 'OL', True),           # Olympiske Leker
-        (r'norgesmesterskap', 'NM', True),
-        (r'ungdomsmesterskap', 'UM', True),
-        (r'europamesterskap', 'EM', True),
-        (r'diamond\s*league', 'Diamond League', True),
-        (r'bislett\s*games', 'Bislett Games', True),
-    ]
-
-    for pattern, champ_type, is_champ in championship_patterns:
-        if re.search(pattern, competition_name, re.IGNORECASE):
-            info['is_championship'] = is_champ
+    for pattern, champ_type in CHAMPIONSHIP_PATTERNS:
+        if pattern.search(competition_name):
+            info['is_championship'] = True
             info['championship_type'] = champ_type
             break
 
     return info
 
 
+def find_similar_names(names: list, blocks: list, score_cutoff: int = FUZZY_SCORE_CUTOFF) -> list:
+    """
+    Cluster near-identical names (case, punctuation, small typos) with rapidfuzz.
+
+    Only names sharing a block key are compared; the block is further split by
+    first character, championship type and the numbers in the name, so
+    'NM Friidrett' / 'UM Friidrett' or 'Stevne 1' / 'Stevne 2' never merge.
+    Returns clusters of indexes into `names` with more than one member.
+    """
+    from rapidfuzz import fuzz, process, utils
+
+    parent = list(range(len(names)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    buckets = defaultdict(list)
+    for i, (name, block) in enumerate(zip(names, blocks)):
+        processed = utils.default_process(name)
+        key = (block, processed[:1], extract_meet_info(name)['championship_type'],
+               tuple(DIGITS_RE.findall(name)))
+        buckets[key].append(i)
+
+    for indexes in buckets.values():
+        if len(indexes) < 2:
+            continue
+        bucket_names = [names[i] for i in indexes]
+        scores = process.cdist(bucket_names, bucket_names, scorer=fuzz.ratio,
+                               processor=utils.default_process, score_cutoff=score_cutoff)
+        for a, b in zip(*scores.nonzero()):
+            if a < b:
+                parent[find(indexes[a])] = find(indexes[b])
+
+    clusters = defaultdict(list)
+    for i in range(len(names)):
+        clusters[find(i)].append(i)
+    return [members for members in clusters.values() if len(members) > 1]
+
+
+def merge_similar_groups(groups: dict) -> dict:
+    """Merge (normalized_name, year) groups whose names differ only slightly"""
+    keys = list(groups)
+    clusters = find_similar_names([name for name, _ in keys], [year for _, year in keys])
+
+    canonical = {}
+    for cluster in clusters:
+        # The name used by most competition records becomes the canonical one
+        cluster_keys = sorted((keys[i] for i in cluster), key=lambda k: (-len(groups[k]), k[0]))
+        for key in cluster_keys:
+            canonical[key] = cluster_keys[0]
+
+    merged = {}
+    for key, comps in groups.items():
+        merged.setdefault(canonical.get(key, key), []).extend(comps)
+    return merged
+
+
 def analyze_competitions():
     """Analyze competition data to find patterns and potential groupings"""
     conn = get_connection()
     cursor = conn.cursor()
+    cursor.row_factory = None  # Report loops unpack plain tuples
 
     print("\n" + "=" * 70)
     print("COMPETITION ANALYSIS")
@@ -156,24 +369,27 @@ def analyze_competitions():
     with_results = cursor.fetchone()[0]
     print(f"Competitions with results: {with_results:,}")
 
-    # Find potential NM/UM championships
+    # Find championships (flag set by init_competition_groups; analyze only reads)
     print("\n" + "-" * 70)
     print("DETECTED CHAMPIONSHIPS (sample):")
     print("-" * 70)
 
-    cursor.execute("""
-        SELECT c.id, c.name, c.date, c.year, v.name as venue, COUNT(r.id) as result_count
-        FROM competitions c
-        LEFT JOIN venues v ON c.venue_id = v.id
-        LEFT JOIN results r ON r.competition_id = c.id
-        WHERE c.name LIKE '%NM%' OR c.name LIKE '%UM%' OR c.name LIKE '%Norgesmesterskap%'
-        GROUP BY c.id
-        ORDER BY c.year DESC, c.date DESC
-        LIMIT 20
-    """)
-
-    for row in cursor.fetchall():
-        print(f"  [{row['id']:>6}] {row['date']} | {row['name'][:50]:<50} | {row['result_count']:>5} results")
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(competitions)")]
+    if 'is_championship' not in columns:
+        print("  Championships not classified yet - run: python competition_linking.py init")
+    else:
+        cursor.execute("""
+            SELECT c.id, c.name, c.date, c.year, v.name as venue,
+                   (SELECT COUNT(*) FROM results r WHERE r.competition_id = c.id) as result_count
+            FROM competitions c
+            LEFT JOIN venues v ON c.venue_id = v.id
+            WHERE c.is_championship = 1
+            ORDER BY c.year DESC, c.date DESC
+            LIMIT 20
+        """)
+
+        for comp_id, name, date, year, venue, result_count in cursor.fetchall():
+            print(f"  [{comp_id:>6}] {date} | {name[:50]:<50} | {result_count:>5} results")
 
     # Find multi-day competitions (same name, different dates)
     print("\n" + "-" * 70)
@@ -195,8 +411,8 @@ def analyze_competitions():
         LIMIT 15
     """)
 
-    for row in cursor.fetchall():
-        print(f"  {row['days']} days | {row['start']} to {row['end']} | {row['name'][:45]:<45} | {row['total_results'] or 0:>6} results")
+    for name, days, start, end, comp_records, total_results in cursor.fetchall():
+        print(f"  {days} days | {start} to {end} | {name[:45]:<45} | {total_results or 0:>6} results")
 
     # Venue name variations
     print("\n" + "-" * 70)
@@ -204,7 +420,7 @@ def analyze_competitions():
     print("-" * 70)
 
     cursor.execute("""
-        SELECT name, COUNT(*) as result_count
+        SELECT v.name, COUNT(*) as result_count
         FROM venues v
         JOIN competitions c ON c.venue_id = v.id
         JOIN results r ON r.competition_id = c.id
@@ -213,16 +429,30 @@ def analyze_competitions():
         LIMIT 20
     """)
 
-    venues = cursor.fetchall()
-    for v in venues:
-        print(f"  {v['result_count']:>8} results | {v['name']}")
-
-    conn.close()
+    for name, result_count in cursor.fetchall():
+        print(f"  {result_count:>8} results | {name}")
+
+    print("\nSimilar venue names:")
+    cursor.execute("SELECT name FROM venues ORDER BY name")
+    venue_names = [name for name, in cursor.fetchall()]
+    try:
+        clusters = find_similar_names(venue_names, [''] * len(venue_names))
+    except ImportError:
+        print("  rapidfuzz not installed (pip install rapidfuzz numpy)")
+        clusters = []
+    for cluster in clusters[:20]:
+        print(f"  {' | '.join(venue_names[i] for i in cluster)}")
+
+    close_connection(conn)
     print("\n" + "=" * 70)
 
 
-def auto_group_competitions():
-    """Automatically group competitions into meets based on name patterns"""
+def auto_group_competitions(fuzzy: bool = False):
+    """
+    Automatically group competitions into meets based on name patterns.
+    With fuzzy=True, groups whose names differ only by case, punctuation or a
+    small typo are merged as well (requires rapidfuzz + numpy).
+    """
     conn = get_connection()
     cursor = conn.cursor()
 
@@ -247,7 +477,7 @@ def auto_group_competitions():
 
         # Normalize the name
         # Remove location prefix (e.g., "Kristiansand, " or "Oslo/Bi, ")
-        normalized = re.sub(r'^[^,]+,\s*', '', name)
+        normalized = LOCATION_PREFIX_RE.sub('', name)
         # Remove extra whitespace
         normalized = ' '.join(normalized.split())
 
@@ -255,10 +485,29 @@ def auto_group_competitions():
         key = (normalized, year)
         groups[key].append(comp)
 
+    if fuzzy:
+        try:
+            group_count = len(groups)
+            groups = merge_similar_groups(groups)
+            print(f"Merged {group_count - len(groups)} near-duplicate name groups")
+        except ImportError:
+            print("rapidfuzz not installed (pip install rapidfuzz numpy) - using exact name grouping")
+
+    # Result counts per competition in one pass instead of one query per competition
+    cursor.execute("""
+        SELECT competition_id, COUNT(*)
+        FROM results
+        GROUP BY competition_id
+    """)
+    result_counts = dict(cursor.fetchall())
+
     # Create meets for groups with multiple competitions or championships
     meets_created = 0
     links_created = 0
 
+    # All meets and links are written in a single transaction
+    cursor.execute("BEGIN")
+
     for (normalized_name, year), comps in groups.items():
         if not normalized_name:
             continue
@@ -270,10 +519,7 @@ def auto_group_competitions():
         # 2. Championships
         # 3. Events with significant results
 
-        total_results = 0
-        for c in comps:
-            cursor.execute("SELECT COUNT(*) FROM results WHERE competition_id = ?", (c['id'],))
-            total_results += cursor.fetchone()[0]
+        total_results = sum(result_counts.get(c['id'], 0) for c in comps)
 
         should_create = (
             len(comps) > 1 or
@@ -287,9 +533,9 @@ def auto_group_competitions():
             start_date = min(dates) if dates else None
             end_date = max(dates) if dates else None
 
-            # Use most common venue
-            venue_ids = [c['venue_id'] for c in comps if c['venue_id']]
-            venue_id = max(set(venue_ids), key=venue_ids.count) if venue_ids else None
+            # Use most common venue (lowest id on ties)
+            venue_counts = Counter(c['venue_id'] for c in comps if c['venue_id'])
+            venue_id = min(venue_counts, key=lambda v: (-venue_counts[v], v)) if venue_counts else None
 
             # Create short name
             short_name = None
@@ -313,16 +559,16 @@ def auto_group_competitions():
             meet_id = cursor.lastrowid
             meets_created += 1
 
-            # Link competitions to meet
-            for comp in comps:
-                cursor.execute("""
-                    INSERT OR IGNORE INTO competition_meet_links (competition_id, meet_id, confidence)
-                    VALUES (?, ?, ?)
-                """, (comp['id'], meet_id, 0.8))  # 0.8 confidence for auto-grouping
-                links_created += 1
+            # Link competitions to meet (0.8 confidence for auto-grouping)
+            links = [(comp['id'], meet_id, 0.8) for comp in comps]
+            cursor.executemany("""
+                INSERT OR IGNORE INTO competition_meet_links (competition_id, meet_id, confidence)
+                VALUES (?, ?, ?)
+            """, links)
+            links_created += len(links)
 
     conn.commit()
-    conn.close()
+    close_connection(conn)
 
     print(f"Created {meets_created} meets")
     print(f"Created {links_created} competition links")
@@ -336,22 +582,32 @@ def search_competitions(query: str):
     print(f"\nSearching for: '{query}'")
     print("=" * 70)
 
+    if len(query) >= FTS_MIN_QUERY_LENGTH:
+        phrase = '"' + query.replace('"', '""') + '"'
+        meet_filter = "m.id IN (SELECT rowid FROM meets_fts WHERE meets_fts MATCH ?)"
+        meet_params = (phrase,)
+        comp_filter = "c.id IN (SELECT rowid FROM competitions_fts WHERE competitions_fts MATCH ?)"
+        comp_params = (phrase,)
+    else:
+        meet_filter = "m.name LIKE ? OR m.short_name LIKE ?"
+        meet_params = (f'%{query}%', f'%{query}%')
+        comp_filter = "c.name LIKE ?"
+        comp_params = (f'%{query}%',)
+
     # Search meets first
-    cursor.execute("""
+    cursor.execute(f"""
         SELECT m.id, m.name, m.short_name, m.year, m.start_date, m.end_date,
                v.name as venue, m.is_championship,
                COUNT(DISTINCT cml.competition_id) as comp_count,
-               (SELECT COUNT(*) FROM results r
-                JOIN competition_meet_links cml2 ON r.competition_id = cml2.competition_id
-                WHERE cml2.meet_id = m.id) as result_count
+               (SELECT COUNT(*) FROM meet_results mr WHERE mr.meet_id = m.id) as result_count
         FROM meets m
         LEFT JOIN venues v ON m.venue_id = v.id
         LEFT JOIN competition_meet_links cml ON m.id = cml.meet_id
-        WHERE m.name LIKE ? OR m.short_name LIKE ?
+        WHERE {meet_filter}
         GROUP BY m.id
         ORDER BY m.year DESC, m.start_date DESC
         LIMIT 20
-    """, (f'%{query}%', f'%{query}%'))
+    """, meet_params)
 
     meets = cursor.fetchall()
 
@@ -366,16 +622,16 @@ def search_competitions(query: str):
             print()
 
     # Also search raw competitions
-    cursor.execute("""
+    cursor.execute(f"""
         SELECT c.id, c.name, c.date, v.name as venue, COUNT(r.id) as result_count
         FROM competitions c
         LEFT JOIN venues v ON c.venue_id = v.id
         LEFT JOIN results r ON r.competition_id = c.id
-        WHERE c.name LIKE ?
+        WHERE {comp_filter}
         GROUP BY c.id
         ORDER BY c.date DESC
         LIMIT 20
-    """, (f'%{query}%',))
+    """, comp_params)
 
     comps = cursor.fetchall()
 
@@ -385,7 +641,7 @@ def search_competitions(query: str):
         for c in comps:
             print(f"  [{c['id']:>6}] {c['date']} | {c['name'][:50]:<50} | {c['result_count']:>5} results")
 
-    conn.close()
+    close_connection(conn)
 
 
 def show_meet_results(meet_id: int):
@@ -412,7 +668,8 @@ def show_meet_results(meet_id: int):
     print(f"Venue: {meet['venue_name'] or 'Unknown'}")
     print("=" * 70)
 
-    # Get all results grouped by event
+    # Get all results grouped by event (plain tuples for the per-row loop)
+    cursor.row_factory = None
     cursor.execute("""
         SELECT
             e.name as event_name,
@@ -437,18 +694,18 @@ def show_meet_results(meet_id: int):
     results = cursor.fetchall()
 
     current_event = None
-    for r in results:
-        if r['event_name'] != current_event:
-            current_event = r['event_name']
-            indoor_outdoor = "Outdoor" if r['is_outdoor'] else "Indoor"
+    for event_name, athlete_name, result, result_numeric, wind, placement, club_name, is_outdoor, date in results:
+        if event_name != current_event:
+            current_event = event_name
+            indoor_outdoor = "Outdoor" if is_outdoor else "Indoor"
             print(f"\n{current_event} ({indoor_outdoor}):")
             print("-" * 60)
 
-        wind = f"({r['wind']})" if r['wind'] else ""
-        print(f"  {r['placement'] or '-':>6} | {r['result']:>10} {wind:<8} | {r['athlete_name']:<25} | {r['club_name'] or ''}")
+        wind = f"({wind})" if wind else ""
+        print(f"  {placement or '-':>6} | {result:>10} {wind:<8} | {athlete_name:<25} | {club_name or ''}")
 
     print(f"\nTotal results: {len(results)}")
-    conn.close()
+    close_connection(conn)
 
 
 def main():
@@ -457,6 +714,7 @@ def main():
         print("  python competition_linking.py init              # Create grouping tables")
         print("  python competition_linking.py analyze           # Analyze competition patterns")
         print("  python competition_linking.py group             # Auto-group competitions")
+        print("  python competition_linking.py group --fuzzy     # ... merging near-identical names")
         print("  python competition_linking.py search <query>    # Search competitions")
         print("  python competition_linking.py show <meet_id>    # Show meet results")
         return
@@ -469,7 +727,7 @@ def main():
         analyze_competitions()
     elif command == 'group':
         init_competition_groups()
-        auto_group_competitions()
+        auto_group_competitions(fuzzy='--fuzzy' in sys.argv[2:])
     elif command == 'search' and len(sys.argv) > 2:
         search_competitions(sys.argv[2])
     elif command == 'show' and len(sys.argv) > 2:
@@ -6,29 +6,56 @@ Usage:
     python comprehensive_scraper.py init          # Initialize database
     python comprehensive_scraper.py scrape A      # Scrape letter A
     python comprehensive_scraper.py scrape A 0 100  # Scrape first 100 of A
+    python comprehensive_scraper.py scrape A --cached  # Re-parse cached pages (all athletes), fetch only missing
+    python comprehensive_scraper.py scrape A --defer-indexes  # Bulk load, rebuild results indexes at the end
+    python comprehensive_scraper.py scrape A --force   # Also re-scrape athletes updated in the last 30 days
     python comprehensive_scraper.py status        # Show progress
     python comprehensive_scraper.py verify        # Verify data integrity
 """
 
-import requests
 import json
+import mmap
 import os
 import re
 import sys
-import time
 import sqlite3
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from bs4 import BeautifulSoup
 from typing import Optional, Dict, List, Tuple, Any
 import logging
-from contextlib import contextmanager
+from contextlib import closing, contextmanager
+
+from fetching import (
+    RateLimiter, fetch_in_order, load_cached_page, make_parse_pool, make_session, save_cached_page,
+    throttled_request, zstandard,
+)
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None  # scrape unavailable, init/status/verify still work
+from functools import lru_cache
 
 # Configuration
 DB_PATH = "athletics_stats.db"
 SEARCH_HTML_DIR = "athlete_search_html"
-DELAY_BETWEEN_REQUESTS = 0.2  # seconds
-MAX_RETRIES = 3
-RETRY_DELAY = 5  # seconds
+DELAY_BETWEEN_REQUESTS = 0.2  # seconds, minimum spacing across all fetch threads
+FETCH_WORKERS = 8  # concurrent athlete page fetches
+PARSE_WORKERS = os.cpu_count() or 1  # processes parsing fetched pages (1 = parse in the fetch threads)
+IN_CLAUSE_CHUNK = 500  # max names per "WHERE name IN (...)" lookup
+CHECKPOINT_EVERY = 100  # athletes per commit / progress update in scrape_letter
+SKIP_UPDATED_WITHIN_DAYS = 30  # scrape_letter skips athletes stored more recently (unless forced)
+
+# Applied to every new connection: WAL + relaxed fsync for write-heavy scraping,
+# 64MB page cache and mmap I/O for the large analytic scans
+CONNECTION_PRAGMAS = """
+    PRAGMA journal_mode = WAL;
+    PRAGMA synchronous = NORMAL;
+    PRAGMA cache_size = -65536;
+    PRAGMA temp_store = MEMORY;
+    PRAGMA mmap_size = 2147483648;
+    PRAGMA busy_timeout = 5000;
+"""
 
 # Setup logging
 logging.basicConfig(
@@ -41,6 +68,35 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Shared keep-alive session for all fetch threads
+SESSION = make_session(FETCH_WORKERS)
+
+# Precompiled patterns for the per-result parsing helpers
+METER_RE = re.compile(r'(\d+)\s*meter')
+M_RE = re.compile(r'(\d+)\s*m\b')
+KM_RE = re.compile(r'(\d+(?:,\d+)?)\s*km')
+TRAILING_PAREN_RE = re.compile(r'\([^)]*\)$')
+RESULT_RE = re.compile(r'^(\d+)(?:,(\d+))?(?:,(\d+))?$')  # 9,17 / 1,45,04 / 7234
+BIRTH_RE = re.compile(r'(\d{2})\.(\d{2})\.(\d{4})')
+YEAR_AGE_RE = re.compile(r'(\d{4})(?:\s*\((\d+)\))?')
+DATE_RE = re.compile(r'(\d\d)\.(\d\d)\.(\d\d)$', re.ASCII)
+RESULT_WIND_RE = re.compile(r'(.+?)\(([+-]?\d+[,.]?\d*)\)$')
+ATHLETE_LINK_RE = re.compile(rb'showathl=(\d+)[^>]*>([^<]+)')
+
+# (category, keywords) for categorize_event - the first category with a
+# keyword anywhere in the lowercased event name wins
+EVENT_CATEGORY_PATTERNS = tuple(
+    (category, re.compile('|'.join(re.escape(k) for k in keywords)))
+    for category, keywords in (
+        ('combined', ['tikamp', 'sjukamp', 'femkamp', 'mangekamp', 'decathlon', 'heptathlon']),
+        ('relay', ['stafett', 'relay', '4x', '4 x']),
+        ('hurdles', ['hekk', 'hinder', 'hurdle']),
+        ('throws', ['kule', 'diskos', 'spyd', 'slegge', 'shot', 'discus', 'javelin', 'hammer', 'vektkast']),
+        ('jumps', ['høyde', 'stav', 'lengde', 'tresteg', 'high', 'pole', 'long', 'triple']),
+        ('walk', ['kappgang', 'gang', 'walk']),
+    )
+)
+
 
 # =====================================================
 # DATABASE MANAGEMENT
@@ -49,12 +105,16 @@ logger = logging.getLogger(__name__)
 @contextmanager
 def get_db_connection():
     """Context manager for database connections"""
-    conn = sqlite3.connect(DB_PATH)
+    # Implicit transactions open with BEGIN IMMEDIATE so a batch takes the
+    # write lock up front instead of failing on upgrade under a reader
+    conn = sqlite3.connect(DB_PATH, isolation_level='IMMEDIATE')
     conn.row_factory = sqlite3.Row
+    conn.executescript(CONNECTION_PRAGMAS)
     conn.execute("PRAGMA foreign_keys = ON")
     try:
         yield conn
     finally:
+        conn.execute("PRAGMA optimize")
         conn.close()
 
 
@@ -67,6 +127,55 @@ def init_database():
     logger.info(f"Database initialized: {DB_PATH}")
 
 
+def drop_results_indexes(conn):
+    """
+    Drop the non-unique indexes on results for a bulk load, recording their DDL
+    in deferred_indexes so restore_deferred_indexes can rebuild them.
+    UNIQUE indexes are kept since INSERT OR IGNORE relies on them for dedup.
+    """
+    conn.execute("CREATE TABLE IF NOT EXISTS deferred_indexes (name TEXT PRIMARY KEY, sql TEXT NOT NULL)")
+    indexes = conn.execute("""
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'index' AND tbl_name = 'results'
+          AND sql IS NOT NULL AND sql NOT LIKE 'CREATE UNIQUE%'
+    """).fetchall()
+    for name, sql in indexes:
+        conn.execute("INSERT OR REPLACE INTO deferred_indexes (name, sql) VALUES (?, ?)", (name, sql))
+        conn.execute(f'DROP INDEX "{name}"')
+    conn.commit()
+    return [name for name, _ in indexes]
+
+
+def restore_deferred_indexes(conn):
+    """Recreate indexes dropped by drop_results_indexes (also after an interrupted run)"""
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'deferred_indexes'").fetchone():
+        return []
+    indexes = conn.execute("SELECT name, sql FROM deferred_indexes").fetchall()
+    for name, sql in indexes:
+        logger.info(f"Building index {name}")
+        conn.execute(sql)
+        conn.execute("DELETE FROM deferred_indexes WHERE name = ?", (name,))
+        conn.commit()
+    return [name for name, _ in indexes]
+
+
+def count_foreign_key_violations(conn, table: str, after_id: int) -> int:
+    """
+    Count rows of table with id > after_id that reference missing parent rows.
+    PRAGMA foreign_key_check would scan the whole table, this only the rows a
+    run added (ids are AUTOINCREMENT, so never reused).
+    """
+    missing = [
+        f'(t."{column}" IS NOT NULL AND NOT EXISTS '
+        f'(SELECT 1 FROM "{parent}" p WHERE p."{parent_column or "id"}" = t."{column}"))'
+        for _, _, parent, column, parent_column, *_ in conn.execute(f'PRAGMA foreign_key_list("{table}")')
+    ]
+    if not missing:
+        return 0
+    return conn.execute(f'SELECT COUNT(*) FROM "{table}" t WHERE t.id > ? AND ({" OR ".join(missing)})',
+                        (after_id,)).fetchone()[0]
+
+
 # =====================================================
 # CACHING / LOOKUP HELPERS
 # =====================================================
@@ -84,24 +193,90 @@ class LookupCache:
 
     def _load_existing(self):
         """Load existing data into cache"""
+        # Plain tuples load much faster than sqlite3.Row for whole-table reads
         cursor = self.conn.cursor()
+        cursor.row_factory = None
 
-        for row in cursor.execute("SELECT id, name FROM clubs"):
-            self.clubs[row['name']] = row['id']
-
-        for row in cursor.execute("SELECT id, name FROM events"):
-            self.events[row['name']] = row['id']
-
-        for row in cursor.execute("SELECT id, name FROM venues"):
-            self.venues[row['name']] = row['id']
-
-        for row in cursor.execute("SELECT id, name, date, venue_id FROM competitions"):
-            key = (row['name'], row['date'], row['venue_id'])
-            self.competitions[key] = row['id']
+        self.clubs = dict(cursor.execute("SELECT name, id FROM clubs").fetchall())
+        self.events = dict(cursor.execute("SELECT name, id FROM events").fetchall())
+        self.venues = dict(cursor.execute("SELECT name, id FROM venues").fetchall())
+        self.competitions = {
+            (name, date, venue_id): comp_id
+            for name, date, venue_id, comp_id
+            in cursor.execute("SELECT name, date, venue_id, id FROM competitions").fetchall()
+        }
 
         logger.info(f"Loaded cache: {len(self.clubs)} clubs, {len(self.events)} events, "
                    f"{len(self.venues)} venues, {len(self.competitions)} competitions")
 
+    def prefetch(self, results: List[Dict]):
+        """
+        Create every club, event, venue and competition referenced by a page of
+        results with one executemany per table, and backfill their IDs into the
+        cache so the get_or_create_* calls that follow are pure dict lookups.
+        """
+        clubs = _missing_names(results, 'club', self.clubs)
+        self._insert_names('clubs', self.clubs, clubs)
+
+        venues = _missing_names(results, 'venue', self.venues)
+        self._insert_names('venues', self.venues, venues)
+
+        events = _missing_names(results, 'event', self.events)
+        if events:
+            rows = []
+            for name in events:
+                category = categorize_event(name)
+                is_timed = category in TIMED_CATEGORIES
+                rows.append((name, category, is_timed, not is_timed))
+            self.conn.executemany("""
+                INSERT OR IGNORE INTO events (name, category, is_timed, higher_is_better)
+                VALUES (?, ?, ?, ?)
+            """, rows)
+            self._backfill('events', self.events, events)
+
+        competitions = {}  # insertion-ordered set of (name, date, venue_id)
+        for r in results:
+            name = _clean_name(r['competition'])
+            if name is None:
+                continue
+            venue = _clean_name(r['venue'])
+            key = (name, r['date'], self.venues.get(venue) if venue else None)
+            if key not in self.competitions:
+                competitions[key] = None
+        if competitions:
+            self.conn.executemany("""
+                INSERT OR IGNORE INTO competitions (name, date, venue_id, year)
+                VALUES (?, ?, ?, ?)
+            """, [(name, date, venue_id, _year_from_date(date)) for name, date, venue_id in competitions])
+            names = list(dict.fromkeys(name for name, _, _ in competitions))
+            for i in range(0, len(names), IN_CLAUSE_CHUNK):
+                chunk = names[i:i + IN_CLAUSE_CHUNK]
+                rows = self.conn.execute(f"""
+                    SELECT id, name, date, venue_id FROM competitions
+                    WHERE name IN ({','.join('?' * len(chunk))})
+                """, chunk)
+                for row in rows:
+                    key = (row['name'], row['date'], row['venue_id'])
+                    if key in competitions:
+                        self.competitions[key] = row['id']
+
+    def _insert_names(self, table: str, lookup: Dict[str, int], names: List[str]):
+        """Insert missing names into a (id, name) lookup table and cache their IDs"""
+        if not names:
+            return
+        self.conn.executemany(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)",
+                              [(name,) for name in names])
+        self._backfill(table, lookup, names)
+
+    def _backfill(self, table: str, lookup: Dict[str, int], names: List[str]):
+        """Read back IDs for the given names with as few SELECTs as possible"""
+        for i in range(0, len(names), IN_CLAUSE_CHUNK):
+            chunk = names[i:i + IN_CLAUSE_CHUNK]
+            rows = self.conn.execute(
+                f"SELECT id, name FROM {table} WHERE name IN ({','.join('?' * len(chunk))})", chunk)
+            for row in rows:
+                lookup[row['name']] = row['id']
+
     def get_or_create_club(self, name: str) -> Optional[int]:
         """Get or create a club, return its ID"""
         if not name or name.strip() == '':
@@ -113,7 +288,6 @@ class LookupCache:
 
         cursor = self.conn.cursor()
         cursor.execute("INSERT OR IGNORE INTO clubs (name) VALUES (?)", (name,))
-        self.conn.commit()
 
         cursor.execute("SELECT id FROM clubs WHERE name = ?", (name,))
         row = cursor.fetchone()
@@ -133,7 +307,7 @@ class LookupCache:
 
         # Categorize the event
         category = categorize_event(name)
-        is_timed = category in ('sprint', 'middle_distance', 'long_distance', 'hurdles', 'walk', 'relay')
+        is_timed = category in TIMED_CATEGORIES
         higher_is_better = not is_timed
 
         cursor = self.conn.cursor()
@@ -141,7 +315,6 @@ class LookupCache:
             INSERT OR IGNORE INTO events (name, category, is_timed, higher_is_better)
             VALUES (?, ?, ?, ?)
         """, (name, category, is_timed, higher_is_better))
-        self.conn.commit()
 
         cursor.execute("SELECT id FROM events WHERE name = ?", (name,))
         row = cursor.fetchone()
@@ -161,7 +334,6 @@ class LookupCache:
 
         cursor = self.conn.cursor()
         cursor.execute("INSERT OR IGNORE INTO venues (name) VALUES (?)", (name,))
-        self.conn.commit()
 
         cursor.execute("SELECT id FROM venues WHERE name = ?", (name,))
         row = cursor.fetchone()
@@ -180,20 +352,11 @@ class LookupCache:
         if key in self.competitions:
             return self.competitions[key]
 
-        # Extract year from date
-        year = None
-        if date:
-            try:
-                year = int(date.split('-')[0])
-            except:
-                pass
-
         cursor = self.conn.cursor()
         cursor.execute("""
             INSERT OR IGNORE INTO competitions (name, date, venue_id, year)
             VALUES (?, ?, ?, ?)
-        """, (name, date, venue_id, year))
-        self.conn.commit()
+        """, (name, date, venue_id, _year_from_date(date)))
 
         cursor.execute("""
             SELECT id FROM competitions
@@ -207,33 +370,42 @@ class LookupCache:
         return None
 
 
-def categorize_event(event_name: str) -> str:
-    """Categorize an event based on its name"""
-    name_lower = event_name.lower()
+def _clean_name(name: Optional[str]) -> Optional[str]:
+    """Strip a lookup name, treating empty strings as missing"""
+    if not name:
+        return None
+    return name.strip() or None
+
+
+def _missing_names(results: List[Dict], field: str, lookup: Dict[str, int]) -> List[str]:
+    """Distinct cleaned names for a result field not yet in the cache, in page order"""
+    names = dict.fromkeys(_clean_name(r[field]) for r in results)
+    return [name for name in names if name is not None and name not in lookup]
 
-    # Combined events
-    if any(x in name_lower for x in ['tikamp', 'sjukamp', 'femkamp', 'mangekamp', 'decathlon', 'heptathlon']):
-        return 'combined'
 
-    # Relays
-    if any(x in name_lower for x in ['stafett', 'relay', '4x', '4 x']):
-        return 'relay'
+def _year_from_date(date: Optional[str]) -> Optional[int]:
+    """Extract year from a YYYY-MM-DD date"""
+    if date:
+        try:
+            return int(date.split('-')[0])
+        except ValueError:
+            pass
+    return None
+
 
-    # Hurdles
-    if any(x in name_lower for x in ['hekk', 'hinder', 'hurdle']):
-        return 'hurdles'
+# Categories whose results are times (lower is better)
+TIMED_CATEGORIES = ('sprint', 'middle_distance', 'long_distance', 'hurdles', 'walk', 'relay')
 
-    # Throws
-    if any(x in name_lower for x in ['kule', 'diskos', 'spyd', 'slegge', 'shot', 'discus', 'javelin', 'hammer', 'vektkast']):
-        return 'throws'
 
-    # Jumps
-    if any(x in name_lower for x in ['høyde', 'stav', 'lengde', 'tresteg', 'high', 'pole', 'long', 'triple']):
-        return 'jumps'
+@lru_cache(maxsize=8192)
+def categorize_event(event_name: str) -> str:
+    """Categorize an event based on its name"""
+    name_lower = event_name.lower()
 
-    # Walk
-    if any(x in name_lower for x in ['kappgang', 'gang', 'walk']):
-        return 'walk'
+    # Keyword categories, checked in priority order
+    for category, pattern in EVENT_CATEGORY_PATTERNS:
+        if pattern.search(name_lower):
+            return category
 
     # Distance based categorization for running
     # Extract distance if possible
@@ -255,22 +427,23 @@ def categorize_event(event_name: str) -> str:
     return 'other'
 
 
+@lru_cache(maxsize=4096)
 def extract_meters(event_name: str) -> Optional[int]:
     """Extract distance in meters from event name"""
     name = event_name.lower()
 
     # Handle "X meter" format
-    match = re.search(r'(\d+)\s*meter', name)
+    match = METER_RE.search(name)
     if match:
         return int(match.group(1))
 
     # Handle "X m" format
-    match = re.search(r'(\d+)\s*m\b', name)
+    match = M_RE.search(name)
     if match:
         return int(match.group(1))
 
     # Handle km
-    match = re.search(r'(\d+(?:,\d+)?)\s*km', name)
+    match = KM_RE.search(name)
     if match:
         km = float(match.group(1).replace(',', '.'))
         return int(km * 1000)
@@ -290,20 +463,47 @@ def parse_result_to_numeric(result: str, event_name: str) -> Optional[float]:
     """
     if not result:
         return None
+    is_timed = bool(event_name) and categorize_event(event_name) in TIMED_CATEGORIES
+    return _parse_result_numeric(result, is_timed)
+
 
+@lru_cache(maxsize=16384)
+def _parse_result_numeric(result: str, is_timed: bool) -> Optional[float]:
+    """Cached worker for parse_result_to_numeric, keyed on result and event kind"""
     result = result.strip()
 
     # Remove wind info if present (shouldn't be, but just in case)
-    result = re.sub(r'\([^)]*\)$', '', result).strip()
+    result = TRAILING_PAREN_RE.sub('', result).strip()
 
-    # Check if it's a combined event (points - just a number)
-    if re.match(r'^\d{3,5}$', result):
-        return float(result)
+    match = RESULT_RE.match(result)
+    if not match:
+        return _parse_irregular_result(result, is_timed)
+
+    first, second, third = match.groups()
+
+    if second is None:
+        # Points for combined events, or a bare number
+        return float(first)
+
+    if third is not None:
+        # mm,ss,cc format (or m,ss,cc)
+        return int(first) * 60 + int(second) + _hundredths(third) / 100
 
-    # Check if it's a field event (single decimal number)
-    if re.match(r'^\d+,\d{1,2}$', result):
-        return float(result.replace(',', '.'))
+    if len(second) <= 2 or not is_timed:
+        # Field event: m,cm (or a time where ss,cc reads the same)
+        return float(f"{first}.{second}")
 
+    # ss,ccc - time with an odd number of decimals
+    return int(first) + _hundredths(second) / 100
+
+
+def _hundredths(digits: str) -> int:
+    """Hundredths from the decimal part of a time ('04' -> 4, '4' -> 40)"""
+    return int(digits) if len(digits) == 2 else int(digits) * 10
+
+
+def _parse_irregular_result(result: str, is_timed: bool) -> Optional[float]:
+    """Fallback for results that are not plain comma-separated digits"""
     # Check if it's a time format: mm,ss,cc or m,ss,cc or ss,cc
     parts = result.split(',')
 
@@ -312,21 +512,18 @@ def parse_result_to_numeric(result: str, event_name: str) -> Optional[float]:
         try:
             minutes = int(parts[0])
             seconds = int(parts[1])
-            hundredths = int(parts[2]) if len(parts[2]) == 2 else int(parts[2]) * 10
-            return minutes * 60 + seconds + hundredths / 100
+            return minutes * 60 + seconds + _hundredths(parts[2]) / 100
         except:
             pass
 
     elif len(parts) == 2:
         # Could be ss,cc (time) or m,cm (distance)
         # Guess based on event type
-        category = categorize_event(event_name)
-        if category in ('sprint', 'middle_distance', 'long_distance', 'hurdles', 'walk', 'relay'):
+        if is_timed:
             # It's a time: ss,cc
             try:
                 seconds = int(parts[0])
-                hundredths = int(parts[1]) if len(parts[1]) == 2 else int(parts[1]) * 10
-                return seconds + hundredths / 100
+                return seconds + _hundredths(parts[1]) / 100
             except:
                 pass
         else:
@@ -346,12 +543,19 @@ def parse_result_to_numeric(result: str, event_name: str) -> Optional[float]:
     return None
 
 
+@lru_cache(maxsize=8192)
 def parse_date(date_str: str) -> Optional[str]:
     """Parse date from DD.MM.YY format to YYYY-MM-DD"""
     if not date_str:
         return None
+    date_str = date_str.strip()
+    match = DATE_RE.match(date_str)
+    if match:
+        day, month, year = match.groups()
+        return f"{'19' if year > '50' else '20'}{year}-{month}-{day}"
     try:
-        parts = date_str.strip().split('.')
+        # Unpadded day/month and other irregular forms
+        parts = date_str.split('.')
         if len(parts) == 3:
             day, month, year = parts
             year = int(year)
@@ -370,7 +574,7 @@ def parse_birth_date(birth_str: str) -> Optional[str]:
     if not birth_str:
         return None
     try:
-        match = re.search(r'(\d{2})\.(\d{2})\.(\d{4})', birth_str)
+        match = BIRTH_RE.search(birth_str)
         if match:
             day, month, year = match.groups()
             return f"{year}-{month}-{day}"
@@ -379,22 +583,19 @@ def parse_birth_date(birth_str: str) -> Optional[str]:
     return None
 
 
+@lru_cache(maxsize=4096)
 def parse_year_age(year_age_str: str) -> Tuple[Optional[int], Optional[int]]:
     """Parse year and age from '2015 (14)' format"""
     if not year_age_str:
         return None, None
-    try:
-        match = re.match(r'(\d{4})\s*\((\d+)\)', year_age_str.strip())
-        if match:
-            return int(match.group(1)), int(match.group(2))
-        match = re.match(r'(\d{4})', year_age_str.strip())
-        if match:
-            return int(match.group(1)), None
-    except:
-        pass
+    match = YEAR_AGE_RE.match(year_age_str.strip())
+    if match:
+        year, age = match.groups()
+        return int(year), int(age) if age else None
     return None, None
 
 
+@lru_cache(maxsize=16384)
 def parse_result_wind(result_str: str) -> Tuple[str, Optional[str]]:
     """Parse result and wind from formats like '9,17(+0,9)'"""
     if not result_str:
@@ -402,7 +603,7 @@ def parse_result_wind(result_str: str) -> Tuple[str, Optional[str]]:
 
     result_str = result_str.strip()
     # Match result followed by wind in parentheses
-    match = re.match(r'(.+?)\(([+-]?\d+[,.]?\d*)\)$', result_str)
+    match = RESULT_WIND_RE.match(result_str)
     if match:
         return match.group(1).strip(), match.group(2)
 
@@ -413,8 +614,14 @@ def parse_result_wind(result_str: str) -> Tuple[str, Optional[str]]:
 # HTML FETCHING AND PARSING
 # =====================================================
 
+rate_limiter = RateLimiter(DELAY_BETWEEN_REQUESTS)
+
+
 def fetch_athlete_results(athlete_id: int) -> str:
-    """Fetch ALL results for an athlete with retry logic"""
+    """
+    Fetch ALL results for an athlete (throttling and retries are handled by
+    throttled_request) and keep it in the page cache
+    """
     url = "https://www.minfriidrettsstatistikk.info/php/UtoverStatistikk.php"
 
     data = {
@@ -422,30 +629,16 @@ def fetch_athlete_results(athlete_id: int) -> str:
         "type": "RES"
     }
 
-    headers = {
-        "Content-Type": "application/x-www-form-urlencoded",
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
-    }
-
-    for attempt in range(MAX_RETRIES):
-        try:
-            response = requests.post(url, data=data, headers=headers, timeout=30)
-            response.encoding = 'utf-8'
-            return response.text
-        except requests.RequestException as e:
-            if attempt < MAX_RETRIES - 1:
-                logger.warning(f"Retry {attempt + 1} for athlete {athlete_id}: {e}")
-                time.sleep(RETRY_DELAY)
-            else:
-                raise
-
-    return ""
+    response = throttled_request(SESSION, rate_limiter, 'POST', url, data=data, timeout=30)
+    # An error page would parse as an empty athlete and be cached
+    response.raise_for_status()
+    save_cached_page(athlete_id, response)
+    response.encoding = 'utf-8'
+    return response.text
 
 
 def parse_athlete_page(html: str, athlete_id: int) -> Dict:
     """Parse athlete page HTML and extract all data"""
-    soup = BeautifulSoup(html, 'html.parser')
-
     data = {
         'athlete_id': athlete_id,
         'name': None,
@@ -453,16 +646,18 @@ def parse_athlete_page(html: str, athlete_id: int) -> Dict:
         'results': []
     }
 
+    tree = LexborHTMLParser(html)
+
     # Extract athlete name
-    athlete_div = soup.find('div', id='athlete')
-    if athlete_div:
-        name_tag = athlete_div.find('h2')
-        if name_tag:
-            data['name'] = name_tag.get_text(strip=True)
+    athlete_div = tree.css_first('div#athlete')
+    if athlete_div is not None:
+        name_tag = athlete_div.css_first('h2')
+        if name_tag is not None:
+            data['name'] = name_tag.text(strip=True)
 
-        birth_tag = athlete_div.find('h3')
-        if birth_tag:
-            data['birth_date'] = parse_birth_date(birth_tag.get_text())
+        birth_tag = athlete_div.css_first('h3')
+        if birth_tag is not None:
+            data['birth_date'] = parse_birth_date(birth_tag.text())
 
     if not data['name']:
         return data
@@ -472,53 +667,52 @@ def parse_athlete_page(html: str, athlete_id: int) -> Dict:
     current_event = None
     is_approved_section = True
 
-    # Process all elements
-    for element in soup.find_all(['div', 'table', 'h4']):
-        if element.name == 'div' and element.get('id') == 'header2':
-            h2 = element.find('h2')
-            if h2:
-                text = h2.get_text(strip=True)
+    # Section/event headers, h4 markers and result tables in document order
+    for element in tree.css('div#header2, div#eventheader, h4, table'):
+        tag = element.tag
+        if tag == 'div' and element.id == 'header2':
+            h2 = element.css_first('h2')
+            if h2 is not None:
+                text = h2.text(strip=True)
                 if 'UTENDØRS' in text:
                     current_section = 'outdoor'
                 elif 'INNENDØRS' in text:
                     current_section = 'indoor'
 
-        elif element.name == 'div' and element.get('id') == 'eventheader':
-            h3 = element.find('h3')
-            if h3:
-                current_event = h3.get_text(strip=True)
+        elif tag == 'div':
+            h3 = element.css_first('h3')
+            if h3 is not None:
+                current_event = h3.text(strip=True)
                 is_approved_section = True  # Reset for new event
 
-        elif element.name == 'h4':
-            text = element.get_text(strip=True)
+        elif tag == 'h4':
+            text = element.text(strip=True)
             if 'Ikke godkjente' in text:
                 is_approved_section = False
 
-        elif element.name == 'table' and current_event and current_section:
-            rows = element.find_all('tr')
-
-            for row in rows:
-                cells = row.find_all('td')
-                if not cells or len(cells) < 6:
+        elif tag == 'table' and current_event and current_section:
+            for row in element.css('tr'):
+                cells = row.css('td')
+                if len(cells) < 6:
                     continue
 
-                year, age = parse_year_age(cells[0].get_text())
-                result_raw = cells[1].get_text(strip=True)
+                year, age = parse_year_age(cells[0].text())
+                result_raw = cells[1].text(strip=True)
                 result, wind = parse_result_wind(result_raw)
-                placement = cells[2].get_text(strip=True)
-                club = cells[3].get_text(strip=True)
-                date_str = cells[4].get_text(strip=True)
+                placement = cells[2].text(strip=True)
+                club = cells[3].text(strip=True)
+                date_str = cells[4].text(strip=True)
                 date = parse_date(date_str)
 
                 # Location cell has venue in title attribute, competition name in text
                 location_cell = cells[5]
-                venue = location_cell.get('title', '').strip()
-                competition_name = location_cell.get_text(strip=True)
+                venue = (location_cell.attributes.get('title') or '').strip()
+                competition_name = location_cell.text(strip=True)
 
                 # Handle rejection reason for non-approved results
                 rejection_reason = None
                 if len(cells) >= 7 and not is_approved_section:
-                    rejection_reason = cells[6].get_text(strip=True)
+                    rejection_reason = cells[6].text(strip=True)
 
                 result_data = {
                     'event': current_event,
@@ -552,22 +746,59 @@ def get_athletes_for_letter(letter: str) -> List[Tuple[int, str]]:
     if not os.path.exists(search_file):
         raise FileNotFoundError(f"Search file not found: {search_file}")
 
-    with open(search_file, 'r', encoding='utf-8') as f:
-        html = f.read()
-
-    # Extract athlete IDs and names
-    pattern = r'showathl=(\d+)[^>]*>([^<]+)'
-    matches = re.findall(pattern, html)
+    if os.path.getsize(search_file) == 0:
+        return []
 
-    return [(int(aid), name.strip()) for aid, name in matches]
+    # Scan the mapped file directly instead of reading and decoding all of it
+    with open(search_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as html:
+        return [
+            (int(match.group(1)), match.group(2).decode('utf-8').strip())
+            for match in ATHLETE_LINK_RE.finditer(html)
+        ]
 
 
 # =====================================================
 # MAIN SCRAPING LOGIC
 # =====================================================
 
-def scrape_athlete(conn, cache: LookupCache, athlete_id: int, athlete_name: str) -> Dict:
-    """Scrape and store a single athlete's data"""
+def fetch_athlete_data(athlete_id: int, use_cache: bool = False,
+                       parse_pool: Optional[ProcessPoolExecutor] = None) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Fetch and parse one athlete page; runs in the fetch worker threads.
+    With a parse_pool the page is parsed in a worker process instead of under the GIL.
+    """
+    try:
+        page = load_cached_page(athlete_id) if use_cache else None
+        html = fetch_athlete_results(athlete_id) if page is None else page.decode('utf-8')
+        if parse_pool is not None:
+            return parse_pool.submit(parse_athlete_page, html, athlete_id).result(), None
+        return parse_athlete_page(html, athlete_id), None
+    except Exception as e:
+        return None, str(e)
+
+
+def fetch_athletes_concurrently(athlete_ids: List[int], use_cache: bool = False):
+    """
+    Yield (athlete_id, data, error) in input order while the pages are fetched
+    by FETCH_WORKERS threads and parsed by PARSE_WORKERS processes. Only a bounded window is in flight, so stopping
+    early does not leave the rest of the letter downloading.
+    """
+    # The fetch threads are wound down before the pool they submit to
+    with make_parse_pool(PARSE_WORKERS) as parse_pool, \
+            closing(fetch_in_order(fetch_athlete_data, athlete_ids, FETCH_WORKERS, use_cache, parse_pool)) as fetched:
+        for athlete_id, (data, error) in zip(athlete_ids, fetched):
+            yield athlete_id, data, error
+
+
+def store_athlete(conn, cache: LookupCache, athlete_id: int, data: Dict,
+                  replace_results: bool = False) -> Dict:
+    """
+    Store a parsed athlete page; runs on the thread that owns the connection.
+    Does not commit - scrape_letter commits together with its progress record.
+    On error nothing from this athlete is left in the open transaction.
+    With replace_results the athlete's stored results are deleted first, so a
+    re-parse replaces rows the old parser got wrong instead of adding to them.
+    """
     result = {
         'status': 'unknown',
         'results_count': 0,
@@ -575,9 +806,6 @@ def scrape_athlete(conn, cache: LookupCache, athlete_id: int, athlete_name: str)
     }
 
     try:
-        html = fetch_athlete_results(athlete_id)
-        data = parse_athlete_page(html, athlete_id)
-
         if not data['name']:
             result['status'] = 'empty'
             result['message'] = 'No athlete data found'
@@ -585,45 +813,67 @@ def scrape_athlete(conn, cache: LookupCache, athlete_id: int, athlete_name: str)
 
         cursor = conn.cursor()
 
-        # Insert/update athlete
-        cursor.execute("""
-            INSERT OR REPLACE INTO athletes (id, name, birth_date, updated_at)
-            VALUES (?, ?, ?, datetime('now'))
-        """, (athlete_id, data['name'], data['birth_date']))
-
-        # Insert results
-        for r in data['results']:
-            event_id = cache.get_or_create_event(r['event'])
-            club_id = cache.get_or_create_club(r['club'])
-            venue_id = cache.get_or_create_venue(r['venue']) if r['venue'] else None
-            competition_id = cache.get_or_create_competition(r['competition'], r['date'], venue_id)
-
-            # Calculate numeric result for sorting
-            result_numeric = parse_result_to_numeric(r['result'], r['event'])
+        # A SAVEPOINT outside a transaction would open (and RELEASE commit) its
+        # own, so open the checkpoint batch's write transaction first
+        if not conn.in_transaction:
+            cursor.execute("BEGIN IMMEDIATE")
 
-            try:
-                cursor.execute("""
-                    INSERT OR IGNORE INTO results (
-                        athlete_id, event_id, club_id, competition_id,
-                        result, result_numeric, wind,
-                        year, age, date, placement,
-                        is_outdoor, is_approved, rejection_reason,
-                        source_athlete_id
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
+        # Savepoint so a failure part-way through drops only this athlete's rows
+        # and the rest of the checkpoint batch can still be committed
+        cursor.execute("SAVEPOINT store_athlete")
+        try:
+            # Insert/update athlete
+            cursor.execute("""
+                INSERT OR REPLACE INTO athletes (id, name, birth_date, updated_at)
+                VALUES (?, ?, ?, datetime('now'))
+            """, (athlete_id, data['name'], data['birth_date']))
+
+            # result is part of the UNIQUE key, so OR IGNORE would keep both versions
+            if replace_results:
+                cursor.execute("DELETE FROM results WHERE athlete_id = ?", (athlete_id,))
+
+            # Create all referenced lookup rows in one batch per table
+            cache.prefetch(data['results'])
+
+            # Insert results; after prefetch the cache dicts answer nearly every lookup,
+            # get_or_create_* only runs for empty names or names that need stripping
+            events, clubs, venues, competitions = cache.events, cache.clubs, cache.venues, cache.competitions
+            rows = []
+            for r in data['results']:
+                event_id = events.get(r['event']) or cache.get_or_create_event(r['event'])
+                club_id = clubs.get(r['club']) or cache.get_or_create_club(r['club'])
+                venue_id = venues.get(r['venue']) or cache.get_or_create_venue(r['venue']) if r['venue'] else None
+                competition_id = (competitions.get((r['competition'], r['date'], venue_id))
+                                  or cache.get_or_create_competition(r['competition'], r['date'], venue_id))
+
+                # Calculate numeric result for sorting
+                result_numeric = parse_result_to_numeric(r['result'], r['event'])
+
+                rows.append((
                     athlete_id, event_id, club_id, competition_id,
                     r['result'], result_numeric, r['wind'],
                     r['year'], r['age'], r['date'], r['placement'],
-                    1 if r['is_outdoor'] else 0,
-                    1 if r['is_approved'] else 0,
+                    r['is_outdoor'], r['is_approved'],  # bools bind as INTEGER 0/1
                     r['rejection_reason'],
                     athlete_id
                 ))
-            except sqlite3.IntegrityError:
-                # Duplicate result, skip
-                pass
 
-        conn.commit()
+            # Duplicates are skipped by OR IGNORE; the caller decides when to commit
+            cursor.executemany("""
+                INSERT OR IGNORE INTO results (
+                    athlete_id, event_id, club_id, competition_id,
+                    result, result_numeric, wind,
+                    year, age, date, placement,
+                    is_outdoor, is_approved, rejection_reason,
+                    source_athlete_id
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+        except Exception:
+            cursor.execute("ROLLBACK TO store_athlete")
+            cursor.execute("RELEASE store_athlete")
+            cache._load_existing()  # forget IDs of rolled-back lookup rows
+            raise
+        cursor.execute("RELEASE store_athlete")
 
         result['status'] = 'success'
         result['results_count'] = len(data['results'])
@@ -637,8 +887,27 @@ def scrape_athlete(conn, cache: LookupCache, athlete_id: int, athlete_name: str)
     return result
 
 
-def scrape_letter(letter: str, start_idx: int = None, end_idx: int = None):
-    """Scrape all athletes for a given letter"""
+def scrape_athlete(conn, cache: LookupCache, athlete_id: int, athlete_name: str) -> Dict:
+    """Scrape and store a single athlete's data"""
+    data, error = fetch_athlete_data(athlete_id)
+    if error:
+        logger.error(f"Error processing athlete {athlete_id}: {error}")
+        return {'status': 'error', 'results_count': 0, 'message': error}
+    result = store_athlete(conn, cache, athlete_id, data)
+    conn.commit()
+    return result
+
+
+def scrape_letter(letter: str, start_idx: int = None, end_idx: int = None, use_cache: bool = False,
+                  defer_indexes: bool = False, force: bool = False):
+    """
+    Scrape all athletes for a given letter.
+    Athletes stored within SKIP_UPDATED_WITHIN_DAYS are skipped unless force is set.
+    With use_cache, pages already in the page cache are re-parsed instead of fetched;
+    this implies force, as re-parsing is how a parser fix reaches stored athletes.
+    With defer_indexes, the non-unique results indexes are dropped during the run
+    and rebuilt once at the end.
+    """
     logger.info(f"{'=' * 60}")
     logger.info(f"SCRAPING LETTER: {letter}")
     logger.info(f"{'=' * 60}")
@@ -649,9 +918,21 @@ def scrape_letter(letter: str, start_idx: int = None, end_idx: int = None):
     logger.info(f"Found {total} athletes for letter {letter}")
 
     with get_db_connection() as conn:
+        # Every id written below comes from LookupCache, so skip the per-row
+        # parent lookups and check the rows added once at the end of the letter
+        conn.execute("PRAGMA foreign_keys = OFF")
+        checked_tables = ('competitions', 'results')
+        max_ids = {table: conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+                   for table in checked_tables}
         cache = LookupCache(conn)
         cursor = conn.cursor()
 
+        if defer_indexes:
+            dropped = drop_results_indexes(conn)
+            logger.info(f"Deferred {len(dropped)} results indexes until the letter is done")
+        else:
+            restore_deferred_indexes(conn)
+
         # Check for existing progress
         cursor.execute("SELECT * FROM scrape_progress WHERE letter = ?", (letter,))
         progress = cursor.fetchone()
@@ -677,31 +958,57 @@ def scrape_letter(letter: str, start_idx: int = None, end_idx: int = None):
         # Process athletes
         success_count = 0
         error_count = 0
+        skipped_count = 0
         total_results = 0
 
-        for i in range(start_idx, end_idx):
-            athlete_id, athlete_name = athletes[i]
-
-            result = scrape_athlete(conn, cache, athlete_id, athlete_name)
+        # Pages are fetched and parsed concurrently (rate limited), but stored
+        # here in order on the single thread that owns the connection
+        athlete_ids = [athlete_id for athlete_id, _ in athletes[start_idx:end_idx]]
+        log_rows = []  # scrape_log rows, written in one batch per checkpoint
+
+        recent_ids = set()
+        if not (force or use_cache):
+            cursor.execute("SELECT id FROM athletes WHERE updated_at > datetime('now', ?)",
+                           (f"-{SKIP_UPDATED_WITHIN_DAYS} days",))
+            recent_ids = {row[0] for row in cursor.fetchall()}
+        fetched = fetch_athletes_concurrently(
+            [athlete_id for athlete_id in athlete_ids if athlete_id not in recent_ids], use_cache)
+
+        for i, athlete_id in enumerate(athlete_ids, start_idx):
+            if athlete_id in recent_ids:
+                result = {'status': 'skipped', 'results_count': 0,
+                          'message': f'Updated within {SKIP_UPDATED_WITHIN_DAYS} days'}
+            else:
+                _, data, error = next(fetched)
+                if error:
+                    logger.error(f"Error processing athlete {athlete_id}: {error}")
+                    result = {'status': 'error', 'results_count': 0, 'message': error}
+                else:
+                    result = store_athlete(conn, cache, athlete_id, data, replace_results=use_cache)
 
-            # Log result
-            cursor.execute("""
-                INSERT INTO scrape_log (athlete_id, status, message, results_count)
-                VALUES (?, ?, ?, ?)
-            """, (athlete_id, result['status'], result['message'], result['results_count']))
+            log_rows.append((athlete_id, result['status'], result['message'], result['results_count']))
 
             if result['status'] == 'success':
                 success_count += 1
                 total_results += result['results_count']
             elif result['status'] == 'error':
                 error_count += 1
+            elif result['status'] == 'skipped':
+                skipped_count += 1
 
             # Progress update
             if (i + 1) % 50 == 0 or i == end_idx - 1:
                 progress_pct = ((i - start_idx + 1) / (end_idx - start_idx)) * 100
                 logger.info(f"Progress: {i + 1}/{end_idx} ({progress_pct:.1f}%) - Last: {result['message'][:50]}")
 
-                # Update progress record
+            if (i + 1) % CHECKPOINT_EVERY == 0 or i == end_idx - 1:
+                # Update progress record (committed together with the results since
+                # the last update, so a resume never skips uncommitted athletes)
+                cursor.executemany("""
+                    INSERT INTO scrape_log (athlete_id, status, message, results_count)
+                    VALUES (?, ?, ?, ?)
+                """, log_rows)
+                log_rows.clear()
                 cursor.execute("""
                     UPDATE scrape_progress
                     SET processed_count = ?, last_athlete_index = ?, last_athlete_id = ?, updated_at = datetime('now')
@@ -709,7 +1016,7 @@ def scrape_letter(letter: str, start_idx: int = None, end_idx: int = None):
                 """, (i + 1, i + 1, athlete_id, letter))
                 conn.commit()
 
-            time.sleep(DELAY_BETWEEN_REQUESTS)
+        fetched.close()
 
         # Mark as completed if we processed everything
         if end_idx >= total:
@@ -720,10 +1027,19 @@ def scrape_letter(letter: str, start_idx: int = None, end_idx: int = None):
             """, (letter,))
             conn.commit()
 
+        if defer_indexes:
+            restore_deferred_indexes(conn)
+
+        for table in checked_tables:
+            violations = count_foreign_key_violations(conn, table, max_ids[table])
+            if violations:
+                logger.warning(f"{violations} {table} rows reference missing rows")
+
         logger.info(f"\n{'=' * 60}")
         logger.info(f"LETTER {letter} COMPLETE!")
         logger.info(f"Athletes processed: {success_count}")
         logger.info(f"Total results: {total_results}")
+        logger.info(f"Skipped (recently updated): {skipped_count}")
         logger.info(f"Errors: {error_count}")
         logger.info(f"{'=' * 60}")
 
@@ -769,17 +1085,22 @@ def show_status():
         print(f"{'Letter':<8} {'Progress':<20} {'Results':<12} {'Status'}")
         print("-" * 70)
 
-        for letter in letters:
-            cursor.execute("SELECT * FROM scrape_progress WHERE letter = ?", (letter,))
-            progress = cursor.fetchone()
+        progress_by_letter = {
+            row['letter']: row for row in cursor.execute("SELECT * FROM scrape_progress")
+        }
 
-            # Count results for athletes starting with this letter
-            cursor.execute("""
-                SELECT COUNT(*) FROM results r
-                JOIN athletes a ON r.athlete_id = a.id
-                WHERE a.name LIKE ?
-            """, (f"{letter}%",))
-            letter_results = cursor.fetchone()[0]
+        # Count results per athlete initial in one pass (upper() folds ASCII
+        # only, the same as the LIKE 'X%' it replaces)
+        cursor.execute("""
+            SELECT upper(substr(a.name, 1, 1)), COUNT(*) FROM results r
+            JOIN athletes a ON r.athlete_id = a.id
+            GROUP BY 1
+        """)
+        results_by_letter = dict(cursor.fetchall())
+
+        for letter in letters:
+            progress = progress_by_letter.get(letter)
+            letter_results = results_by_letter.get(letter, 0)
 
             if progress:
                 prog_str = f"{progress['processed_count']}/{progress['total_athletes']}"
@@ -873,6 +1194,9 @@ def main():
         print("  python comprehensive_scraper.py init              # Initialize database")
         print("  python comprehensive_scraper.py scrape <LETTER>   # Scrape letter")
         print("  python comprehensive_scraper.py scrape <LETTER> <START> <END>")
+        print("  python comprehensive_scraper.py scrape <LETTER> --cached  # Re-parse cached pages (all athletes)")
+        print("  python comprehensive_scraper.py scrape <LETTER> --defer-indexes  # Rebuild results indexes at the end")
+        print("  python comprehensive_scraper.py scrape <LETTER> --force   # Also re-scrape recently updated athletes")
         print("  python comprehensive_scraper.py status            # Show progress")
         print("  python comprehensive_scraper.py verify            # Verify data")
         print()
@@ -894,17 +1218,29 @@ def main():
             print("Please specify a letter to scrape")
             return
 
-        letter = sys.argv[2].upper()
+        use_cache = '--cached' in sys.argv
+        defer_indexes = '--defer-indexes' in sys.argv
+        force = '--force' in sys.argv
+        args = [arg for arg in sys.argv if arg not in ('--cached', '--defer-indexes', '--force')]
+
+        letter = args[2].upper()
         valid_letters = list("ABCDEFGHIJKLMNOPQRSTUVWXYZÆØÅ")
         if letter not in valid_letters:
             print(f"Invalid letter: {letter}")
             print(f"Valid letters: {' '.join(valid_letters)}")
             return
 
-        start_idx = int(sys.argv[3]) if len(sys.argv) > 3 else None
-        end_idx = int(sys.argv[4]) if len(sys.argv) > 4 else None
+        start_idx = int(args[3]) if len(args) > 3 else None
+        end_idx = int(args[4]) if len(args) > 4 else None
+
+        if LexborHTMLParser is None:
+            print("selectolax not installed (pip install selectolax) - needed to parse athlete pages")
+            return
+
+        if use_cache and zstandard is None:
+            print("zstandard not installed (pip install zstandard) - fetching all pages")
 
-        scrape_letter(letter, start_idx, end_idx)
+        scrape_letter(letter, start_idx, end_idx, use_cache, defer_indexes, force)
 
     elif command == 'status':
         show_status()
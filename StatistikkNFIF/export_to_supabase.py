@@ -7,6 +7,9 @@ This script exports data from the local SQLite database to:
 
 Usage:
     python export_to_supabase.py csv       # Export to CSV files
+    python export_to_supabase.py csv-fast  # Export to CSV, results via the sqlite3 CLI
+    python export_to_supabase.py csv --by-year  # Export results as parallel per-year shards
+    python export_to_supabase.py copy      # Export to PostgreSQL COPY text files (.tsv)
     python export_to_supabase.py sql       # Generate SQL insert statements
     python export_to_supabase.py stats     # Show export statistics
 """
@@ -14,11 +17,43 @@ Usage:
 import sqlite3
 import csv
 import os
+import shutil
+import subprocess
 import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 
 DB_PATH = "athletics_stats.db"
 EXPORT_DIR = "supabase_export"
+IO_BUFFER_SIZE = 1 << 20  # 1 MiB file buffers, far fewer write() calls on results.csv
+
+# SQLite stores these as 0/1, Supabase expects true/false
+BOOL_COLUMNS = ('is_timed', 'higher_is_better', 'is_outdoor', 'is_approved')
+
+# REAL columns, formatted by SQLite with 17 significant digits: the sqlite3 shell
+# (csv-fast) and replace() (copy) would otherwise print 15 and round the value
+REAL_COLUMNS = ('result_numeric',)
+
+# Tables to export in dependency order
+EXPORT_TABLES = [
+    ('athletes', ['id', 'name', 'birth_date', 'created_at', 'updated_at']),
+    ('clubs', ['id', 'name', 'created_at']),
+    ('events', ['id', 'name', 'category', 'is_timed', 'higher_is_better', 'created_at']),
+    ('venues', ['id', 'name', 'created_at']),
+    ('competitions', ['id', 'name', 'venue_id', 'date', 'year', 'created_at']),
+    ('results', [
+        'id', 'athlete_id', 'event_id', 'club_id', 'competition_id',
+        'result', 'result_numeric', 'wind', 'year', 'age', 'date',
+        'placement', 'is_outdoor', 'is_approved', 'rejection_reason',
+        'source_athlete_id', 'created_at'
+    ]),
+]
+
+# Tables large enough that csv-fast hands them to the sqlite3 command-line shell
+CLI_EXPORT_TABLES = ('results',)
+
+SHARD_WORKERS = os.cpu_count() or 1
+SHARD_MMAP_SIZE = 1 << 30  # each shard worker maps up to 1 GiB of the database
 
 
 def get_connection():
@@ -28,60 +63,51 @@ def get_connection():
     return conn
 
 
-def export_to_csv():
-    """Export all tables to CSV files for Supabase import"""
+def export_to_csv(fast=False, by_year=False):
+    """
+    Export all tables to CSV files for Supabase import.
+    With fast=True the tables in CLI_EXPORT_TABLES are written by the sqlite3
+    command-line shell, skipping Python row handling entirely.
+    With by_year=True results is written as results_<year>.csv shards by a
+    process pool, each worker reading through its own read-only connection.
+    """
     os.makedirs(EXPORT_DIR, exist_ok=True)
 
+    sqlite_cli = shutil.which('sqlite3') if fast else None
+    if fast and not sqlite_cli:
+        print("sqlite3 command-line shell not found, exporting everything with Python")
+
     conn = get_connection()
     cursor = conn.cursor()
-
-    # Tables to export in dependency order
-    tables = [
-        ('athletes', ['id', 'name', 'birth_date', 'created_at', 'updated_at']),
-        ('clubs', ['id', 'name', 'created_at']),
-        ('events', ['id', 'name', 'category', 'is_timed', 'higher_is_better', 'created_at']),
-        ('venues', ['id', 'name', 'created_at']),
-        ('competitions', ['id', 'name', 'venue_id', 'date', 'year', 'created_at']),
-        ('results', [
-            'id', 'athlete_id', 'event_id', 'club_id', 'competition_id',
-            'result', 'result_numeric', 'wind', 'year', 'age', 'date',
-            'placement', 'is_outdoor', 'is_approved', 'rejection_reason',
-            'source_athlete_id', 'created_at'
-        ]),
-    ]
+    cursor.row_factory = None  # plain tuples, csv.writer only needs sequences
 
     print("\nExporting tables to CSV...")
     print("=" * 60)
 
-    for table_name, columns in tables:
+    for table_name, columns in EXPORT_TABLES:
         output_file = os.path.join(EXPORT_DIR, f"{table_name}.csv")
 
         # Get count
         cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
         count = cursor.fetchone()[0]
 
-        # Export data
-        cursor.execute(f"SELECT {', '.join(columns)} FROM {table_name}")
+        if by_year and table_name == 'results':
+            shards = _export_results_by_year(cursor, columns)
+            print(f"  {table_name}: {count:,} rows -> {len(shards)} files ({EXPORT_DIR}/results_<year>.csv)")
+            continue
+
+        if sqlite_cli and table_name in CLI_EXPORT_TABLES:
+            _export_with_cli(sqlite_cli, table_name, columns, output_file)
+            print(f"  {table_name}: {count:,} rows -> {output_file}")
+            continue
+
+        # Export data, booleans already converted by SQLite
+        cursor.execute(_select_sql(table_name, columns))
 
-        with open(output_file, 'w', newline='', encoding='utf-8') as f:
+        with open(output_file, 'w', newline='', encoding='utf-8', buffering=IO_BUFFER_SIZE) as f:
             writer = csv.writer(f)
             writer.writerow(columns)
-
-            batch_size = 10000
-            while True:
-                rows = cursor.fetchmany(batch_size)
-                if not rows:
-                    break
-                for row in rows:
-                    # Convert Row object to list, handling booleans for Supabase
-                    row_data = []
-                    for i, col in enumerate(columns):
-                        val = row[i]
-                        # Convert SQLite integers back to booleans for boolean columns
-                        if col in ('is_timed', 'higher_is_better', 'is_outdoor', 'is_approved'):
-                            val = 'true' if val else 'false'
-                        row_data.append(val)
-                    writer.writerow(row_data)
+            writer.writerows(cursor)
 
         print(f"  {table_name}: {count:,} rows -> {output_file}")
 
@@ -95,6 +121,116 @@ def export_to_csv():
     print("3. Reset sequences after import")
 
 
+def export_to_copy():
+    """
+    Export all tables as PostgreSQL COPY text format files (tab separated,
+    \\N for NULL, no quoting). SQLite does the escaping in the SELECT, so
+    csv.writer only joins the fields.
+    """
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.row_factory = None
+
+    print("\nExporting tables to COPY text format...")
+    print("=" * 60)
+
+    for table_name, columns in EXPORT_TABLES:
+        output_file = os.path.join(EXPORT_DIR, f"{table_name}.tsv")
+
+        cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+        count = cursor.fetchone()[0]
+
+        cursor.execute(_copy_select_sql(table_name, columns))
+        with open(output_file, 'w', newline='', encoding='utf-8', buffering=IO_BUFFER_SIZE) as f:
+            writer = csv.writer(f, delimiter='\t', quoting=csv.QUOTE_NONE,
+                                quotechar=None, escapechar=None, lineterminator='\n')
+            writer.writerows(cursor)
+
+        print(f"  {table_name}: {count:,} rows -> {output_file}")
+
+    conn.close()
+
+    print("=" * 60)
+    print(f"\nCOPY files exported to: {EXPORT_DIR}/")
+    print("\nTo import to Supabase, create the tables (see schema.sql) and run in order:")
+    for table_name, columns in EXPORT_TABLES:
+        print(f"  psql -c \"\\copy {table_name} ({', '.join(columns)}) FROM '{table_name}.tsv' WITH (FORMAT text)\"")
+    print("Then reset sequences after import")
+
+
+def _copy_select_sql(table_name, columns):
+    """Build the COPY export SELECT: booleans as true/false, text escaped, NULL as \\N"""
+    select_cols = []
+    for col in columns:
+        if col in BOOL_COLUMNS:
+            select_cols.append(f"CASE WHEN {col} THEN 'true' ELSE 'false' END")
+        elif col in REAL_COLUMNS:
+            select_cols.append(f"COALESCE({_real_sql(col)}, '\\N')")
+        else:
+            # Backslash first, then the characters COPY treats as delimiters
+            escaped = f"replace({col}, '\\', '\\\\')"
+            for char_code, escape in ((9, '\\t'), (10, '\\n'), (13, '\\r')):
+                escaped = f"replace({escaped}, char({char_code}), '{escape}')"
+            select_cols.append(f"COALESCE({escaped}, '\\N')")
+    return f"SELECT {', '.join(select_cols)} FROM {table_name}"
+
+
+def _real_sql(col):
+    """A REAL column as text that reads back as the same double; NULL stays NULL"""
+    return f"CASE WHEN {col} IS NULL THEN NULL ELSE printf('%!.17g', {col}) END"
+
+
+def _select_sql(table_name, columns):
+    """Build the export SELECT, letting SQLite turn boolean columns into 'true'/'false'"""
+    select_cols = []
+    for col in columns:
+        if col in BOOL_COLUMNS:
+            select_cols.append(f"CASE WHEN {col} THEN 'true' ELSE 'false' END AS {col}")
+        elif col in REAL_COLUMNS:
+            select_cols.append(f"{_real_sql(col)} AS {col}")
+        else:
+            select_cols.append(col)
+    return f"SELECT {', '.join(select_cols)} FROM {table_name}"
+
+
+def _export_results_by_year(cursor, columns):
+    """Write results as one CSV per year in parallel, return the shard paths"""
+    years = [row[0] for row in cursor.execute("SELECT DISTINCT year FROM results")]
+    workers = max(1, min(SHARD_WORKERS, len(years)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_export_results_year, years, [columns] * len(years)))
+
+
+def _export_results_year(year, columns):
+    """Worker: stream one year of results to its own CSV over a read-only connection"""
+    output_file = os.path.join(EXPORT_DIR, f"results_{year if year is not None else 'unknown'}.csv")
+    conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+    conn.execute(f"PRAGMA mmap_size = {SHARD_MMAP_SIZE}")
+    try:
+        cursor = conn.execute(_select_sql('results', columns) + " WHERE year IS ?", (year,))
+        with open(output_file, 'w', newline='', encoding='utf-8', buffering=IO_BUFFER_SIZE) as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerows(cursor)
+    finally:
+        conn.close()
+    return output_file
+
+
+def _export_with_cli(sqlite_cli, table_name, columns, output_file):
+    """Write one table to CSV with the sqlite3 shell"""
+    script = "\n".join([
+        ".bail on",
+        ".headers on",
+        ".mode csv",
+        f".output '{output_file}'",
+        _select_sql(table_name, columns) + ";",
+    ]) + "\n"
+    subprocess.run([sqlite_cli, '-readonly', DB_PATH], input=script, text=True, check=True)
+
+
 def generate_supabase_schema():
     """Generate Supabase-compatible PostgreSQL schema"""
     schema = """-- Supabase Schema for Norwegian Athletics Statistics
@@ -265,60 +401,77 @@ LEFT JOIN venues v ON comp.venue_id = v.id;
     print(f"\nSupabase schema written to: {output_file}")
 
 
-def show_stats():
-    """Show statistics about the data to be exported"""
+def collect_stats():
+    """Run the statistics queries on their own connection and return the figures"""
     conn = get_connection()
     cursor = conn.cursor()
 
+    # One scan each of athletes and results covers every figure below;
+    # COUNT(expr) skips NULLs, so it stays 0 rather than NULL on an empty table
+    cursor.execute("SELECT COUNT(*), COUNT(birth_date) FROM athletes")
+    total_athletes, athletes_with_dob = cursor.fetchone()
+    cursor.execute("""
+        SELECT COUNT(*), COUNT(competition_id), COUNT(result_numeric),
+               COUNT(CASE WHEN is_approved = 1 THEN 1 END), MIN(year), MAX(year)
+        FROM results
+    """)
+    (total_results, results_with_comp, results_with_numeric,
+     approved, min_year, max_year) = cursor.fetchone()
+
+    table_counts = {'athletes': total_athletes}
+    for table in ['clubs', 'events', 'venues', 'competitions']:
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        table_counts[table] = cursor.fetchone()[0]
+    table_counts['results'] = total_results
+
+    conn.close()
+    return {
+        'table_counts': table_counts,
+        'athletes_with_dob': athletes_with_dob,
+        'results_with_comp': results_with_comp,
+        'results_with_numeric': results_with_numeric,
+        'approved': approved,
+        'min_year': min_year,
+        'max_year': max_year,
+    }
+
+
+def show_stats(stats=None):
+    """Show statistics about the data to be exported (collecting them unless given)"""
+    if stats is None:
+        stats = collect_stats()
+    table_counts = stats['table_counts']
+    total_athletes = table_counts['athletes']
+    total_results = table_counts['results']
+    athletes_with_dob = stats['athletes_with_dob']
+    results_with_comp = stats['results_with_comp']
+    results_with_numeric = stats['results_with_numeric']
+    approved = stats['approved']
+
     print("\n" + "=" * 60)
     print("EXPORT STATISTICS")
     print("=" * 60)
 
-    tables = ['athletes', 'clubs', 'events', 'venues', 'competitions', 'results']
-
     print("\nTable sizes:")
-    for table in tables:
-        cursor.execute(f"SELECT COUNT(*) FROM {table}")
-        count = cursor.fetchone()[0]
+    for table, count in table_counts.items():
         print(f"  {table}: {count:,} rows")
 
     # Estimate CSV file sizes
     print("\nEstimated export sizes:")
-    cursor.execute("SELECT COUNT(*) FROM results")
-    result_count = cursor.fetchone()[0]
     # Rough estimate: 200 bytes per result row
-    estimated_results_size = result_count * 200 / (1024 * 1024)
+    estimated_results_size = total_results * 200 / (1024 * 1024)
     print(f"  results.csv: ~{estimated_results_size:.1f} MB")
 
     # Data quality summary
     print("\nData quality:")
-
-    cursor.execute("SELECT COUNT(*) FROM athletes WHERE birth_date IS NOT NULL")
-    athletes_with_dob = cursor.fetchone()[0]
-    cursor.execute("SELECT COUNT(*) FROM athletes")
-    total_athletes = cursor.fetchone()[0]
     print(f"  Athletes with birth date: {athletes_with_dob:,}/{total_athletes:,} ({100*athletes_with_dob/total_athletes:.1f}%)")
-
-    cursor.execute("SELECT COUNT(*) FROM results WHERE competition_id IS NOT NULL")
-    results_with_comp = cursor.fetchone()[0]
-    cursor.execute("SELECT COUNT(*) FROM results")
-    total_results = cursor.fetchone()[0]
     print(f"  Results with competition: {results_with_comp:,}/{total_results:,} ({100*results_with_comp/total_results:.1f}%)")
-
-    cursor.execute("SELECT COUNT(*) FROM results WHERE result_numeric IS NOT NULL")
-    results_with_numeric = cursor.fetchone()[0]
     print(f"  Results with numeric value: {results_with_numeric:,}/{total_results:,} ({100*results_with_numeric/total_results:.1f}%)")
-
-    cursor.execute("SELECT COUNT(*) FROM results WHERE is_approved = 1")
-    approved = cursor.fetchone()[0]
     print(f"  Approved results: {approved:,}/{total_results:,} ({100*approved/total_results:.1f}%)")
 
     # Year range
-    cursor.execute("SELECT MIN(year), MAX(year) FROM results WHERE year IS NOT NULL")
-    row = cursor.fetchone()
-    print(f"\n  Year range: {row[0]} - {row[1]}")
+    print(f"\n  Year range: {stats['min_year']} - {stats['max_year']}")
 
-    conn.close()
     print("=" * 60)
 
 
@@ -326,6 +479,9 @@ def main():
     if len(sys.argv) < 2:
         print("Usage:")
         print("  python export_to_supabase.py csv      # Export to CSV files")
+        print("  python export_to_supabase.py csv-fast # Export to CSV, results via the sqlite3 CLI")
+        print("  python export_to_supabase.py csv --by-year  # Export results as per-year shards")
+        print("  python export_to_supabase.py copy     # Export to PostgreSQL COPY text files")
         print("  python export_to_supabase.py schema   # Generate Supabase schema")
         print("  python export_to_supabase.py stats    # Show export statistics")
         print("  python export_to_supabase.py all      # Do everything")
@@ -339,15 +495,23 @@ def main():
     command = sys.argv[1].lower()
 
     if command == 'csv':
-        export_to_csv()
+        export_to_csv(by_year='--by-year' in sys.argv)
+    elif command == 'csv-fast':
+        export_to_csv(fast=True)
+    elif command == 'copy':
+        export_to_copy()
     elif command == 'schema':
         generate_supabase_schema()
     elif command == 'stats':
         show_stats()
     elif command == 'all':
-        generate_supabase_schema()
-        show_stats()
-        export_to_csv()
+        # The statistics scans run on a second connection while the CSV export
+        # streams, and are printed once both are done
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            stats = executor.submit(collect_stats)
+            generate_supabase_schema()
+            export_to_csv()
+            show_stats(stats.result())
     else:
         print(f"Unknown command: {command}")
 
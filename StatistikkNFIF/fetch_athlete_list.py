@@ -1,11 +1,19 @@
 """
 Fetch all athletes from the search page using POST requests
 No browser automation needed - it's a simple form!
+
+Usage:
+    python fetch_athlete_list.py             # Save search pages and athlete IDs
+    python fetch_athlete_list.py --ids-only  # Only save athlete IDs, skip the HTML
 """
 
-import requests
+from concurrent.futures import ThreadPoolExecutor
+import json
 import os
-import time
+import re
+import sys
+
+from fetching import RateLimiter, make_session, throttled_request
 
 OUTPUT_DIR = "athlete_search_html"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -13,8 +21,24 @@ os.makedirs(OUTPUT_DIR, exist_ok=True)
 # Norwegian alphabet (excluding X which has no athletes)
 LETTERS = list("ABCDEFGHIJKLMNOPQRSTUVWYZÆØÅ")
 
-def fetch_athletes_by_letter(letter: str) -> str:
-    """Fetch all athletes whose last name starts with the given letter"""
+FETCH_WORKERS = 4
+REQUEST_INTERVAL = 0.3  # Minimum seconds between request starts, across all workers
+
+# Matched against the raw response bytes, so the page is never decoded
+ATHLETE_ID_RE = re.compile(rb'showathl=(\d+)')
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# One session so the workers reuse keep-alive connections
+SESSION = make_session(FETCH_WORKERS)
+rate_limiter = RateLimiter(REQUEST_INTERVAL)
+
+
+def fetch_athletes_by_letter(letter: str, path: str = None) -> bytearray:
+    """
+    Fetch all athletes whose last name starts with the given letter.
+    The page is streamed in chunks, written to path as it arrives (if given)
+    and returned as the raw bytes.
+    """
     url = "https://www.minfriidrettsstatistikk.info/php/UtoverSok.php"
 
     data = {
@@ -22,18 +46,30 @@ def fetch_athletes_by_letter(letter: str) -> str:
         "showchar": letter
     }
 
-    headers = {
-        "Content-Type": "application/x-www-form-urlencoded",
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
-    }
+    html = bytearray()
+    with throttled_request(SESSION, rate_limiter, 'POST', url, data=data, timeout=30, stream=True) as response:
+        # An error body must not replace a good page (or read as a letter with no athletes)
+        response.raise_for_status()
+        if path is None:
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                html += chunk
+            return html
 
-    response = requests.post(url, data=data, headers=headers)
-    response.encoding = 'utf-8'
+        # Write to a temporary name so an interrupted download never replaces a good page
+        part_path = path + ".part"
+        with open(part_path, 'wb') as f:
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+                html += chunk
+    os.replace(part_path, path)
 
-    return response.text
+    return html
 
 
 def main():
+    # The scrapers read the per-letter pages, so they are kept unless only IDs are wanted
+    ids_only = '--ids-only' in sys.argv
+
     print("=" * 60)
     print("Fetching all athletes by last name letter")
     print("=" * 60)
@@ -41,34 +77,33 @@ def main():
     total_athletes = 0
     all_athlete_ids = []
 
-    for letter in LETTERS:
-        print(f"Fetching letter: {letter}...", end=" ", flush=True)
-
-        try:
-            html = fetch_athletes_by_letter(letter)
-
-            # Save to file
-            filename = f"search_{letter}.html"
-            filepath = os.path.join(OUTPUT_DIR, filename)
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(html)
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+        futures = [
+            executor.submit(
+                fetch_athletes_by_letter, letter,
+                None if ids_only else os.path.join(OUTPUT_DIR, f"search_{letter}.html")
+            )
+            for letter in LETTERS
+        ]
 
-            # Count athletes found
-            athlete_count = html.count("showathl=")
-            total_athletes += athlete_count
+        # Report in alphabetical order while later letters are still downloading
+        for letter, future in zip(LETTERS, futures):
+            print(f"Fetching letter: {letter}...", end=" ", flush=True)
 
-            # Extract athlete IDs
-            import re
-            ids = re.findall(r'showathl=(\d+)', html)
-            all_athlete_ids.extend(ids)
+            try:
+                # Already saved to search_<letter>.html while downloading
+                html = future.result()
 
-            print(f"✓ Found {athlete_count} athletes ({len(html):,} bytes)")
+                # Extract athlete IDs and count athletes found in one scan
+                ids = ATHLETE_ID_RE.findall(html)
+                athlete_count = len(ids)
+                total_athletes += athlete_count
+                all_athlete_ids.extend(aid.decode() for aid in ids)
 
-            # Be nice to the server
-            time.sleep(0.3)
+                print(f"✓ Found {athlete_count} athletes ({len(html):,} bytes)")
 
-        except Exception as e:
-            print(f"✗ Error: {e}")
+            except Exception as e:
+                print(f"✗ Error: {e}")
 
     print("\n" + "=" * 60)
     print(f"TOTAL: {total_athletes} athlete entries")
@@ -84,13 +119,13 @@ def main():
     print(f"\nAll athlete IDs saved to: {ids_file}")
 
     # Also save as JSON for easier processing
-    import json
     json_file = os.path.join(OUTPUT_DIR, "_all_athlete_ids.json")
     with open(json_file, 'w') as f:
         json.dump(unique_ids, f)
     print(f"All athlete IDs saved to: {json_file}")
 
-    print(f"\nHTML files saved to: {OUTPUT_DIR}/")
+    if not ids_only:
+        print(f"\nHTML files saved to: {OUTPUT_DIR}/")
 
 
 if __name__ == "__main__":
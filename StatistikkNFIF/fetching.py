@@ -0,0 +1,186 @@
+"""
+Shared HTTP plumbing for the minfriidrettsstatistikk.info scrapers: a pooled
+keep-alive session, a rate limiter shared by all fetch threads that backs off
+when the server throttles, an in-order concurrent fetch pipeline and the
+athlete page cache.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # page cache disabled
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
+MAX_RETRIES = 3  # attempts per request in total
+RETRY_DELAY = 5  # seconds before the first retry, doubled for each further one
+MAX_INTERVAL = 10.0  # seconds, upper bound on the request spacing while throttled
+PAGE_CACHE_DIR = "page_cache"  # zstd-compressed athlete pages, one file per athlete
+
+# Responses that mean the server wants fewer requests. They are retried by
+# throttled_request rather than by urllib3, so the rate limiter sees each one
+THROTTLE_STATUS = (429, 503)
+
+
+def make_session(pool_size: int = 10, retries: int = MAX_RETRIES,
+                 retry_delay: float = RETRY_DELAY) -> requests.Session:
+    """
+    Keep-alive session with up to pool_size connections to the site. urllib3
+    retries failed connections/reads and gateway errors (retries attempts in
+    total); the site's POSTs are read-only queries, so retrying them is safe.
+    """
+    session = requests.Session()
+    session.headers.update({"User-Agent": USER_AGENT})
+    session.mount('https://', HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(
+            total=retries - 1,
+            backoff_factor=retry_delay,
+            status_forcelist=(502, 504),
+            allowed_methods=None,
+            raise_on_status=False,
+        ),
+    ))
+    return session
+
+
+class RateLimiter:
+    """
+    Spaces out calls from any number of threads by an interval that adapts to
+    the server: doubled when it pushes back (pausing everyone for its
+    Retry-After if given), then eased back towards the base interval, never
+    below it, one step per successful call.
+    """
+
+    def __init__(self, interval: float, max_interval: float = MAX_INTERVAL):
+        self.base_interval = interval
+        self.max_interval = max_interval
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            wait_time = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.interval
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+    def slow_down(self, retry_after: Optional[float] = None):
+        with self._lock:
+            self.interval = min(self.interval * 2, self.max_interval)
+            if retry_after:
+                self._next_time = max(self._next_time, time.monotonic() + retry_after)
+
+    def speed_up(self):
+        with self._lock:
+            self.interval = max(self.base_interval, self.interval - self.base_interval)
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    """Seconds from a Retry-After header (the delay-seconds form only)"""
+    try:
+        return float(response.headers['Retry-After'])
+    except (KeyError, ValueError):
+        return None
+
+
+def throttled_request(session: requests.Session, limiter: RateLimiter, method: str, url: str,
+                      retries: int = MAX_RETRIES, retry_delay: float = RETRY_DELAY,
+                      **kwargs) -> requests.Response:
+    """
+    Send a request through limiter and return the response. A throttling
+    response slows the limiter down, pausing every thread for Retry-After (or
+    the backoff if the server gives none), and is retried (retries attempts in
+    total); other retries are left to the session.
+    """
+    for attempt in range(retries):
+        limiter.wait()
+        try:
+            response = session.request(method, url, **kwargs)
+        except requests.RequestException:
+            # Timeouts and failed connections left after the session's retries
+            limiter.slow_down()
+            raise
+
+        if response.status_code not in THROTTLE_STATUS:
+            limiter.speed_up()
+            return response
+        limiter.slow_down(_retry_after(response) or retry_delay * 2 ** attempt)
+        if attempt < retries - 1:
+            response.close()
+    return response
+
+
+def make_parse_pool(workers: int):
+    """Process pool for parsing pages, or a null context (parse in the fetch threads) for one worker"""
+    if workers <= 1:
+        return nullcontext()
+    # The pool starts its workers on demand from inside the fetch threads, and
+    # a fork there can copy a lock another thread holds into the child; a
+    # forkserver (spawn where there is none) starts them from a clean process
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+
+
+def fetch_in_order(fetch: Callable, items: Iterable, workers: int, *args) -> Iterator:
+    """
+    Yield fetch(item, *args) for each item in input order while `workers`
+    threads run ahead. Only a bounded window is in flight, so what the caller
+    has consumed (and checkpointed) stays in step with what was fetched, and
+    closing the generator does not leave the rest downloading.
+    """
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque(executor.submit(fetch, item, *args) for item in islice(items, workers * 2))
+        while pending:
+            future = pending.popleft()
+            for item in islice(items, 1):
+                pending.append(executor.submit(fetch, item, *args))
+            yield future.result()
+
+
+def _page_cache_path(athlete_id: int) -> str:
+    return os.path.join(PAGE_CACHE_DIR, f"athlete_{athlete_id}.html.zst")
+
+
+def save_cached_page(athlete_id: int, response: requests.Response):
+    """
+    Store a fetched athlete page zstd-compressed (no-op without the zstandard
+    package). Only 2xx bodies are kept: an error page would otherwise be
+    re-parsed as an empty athlete by every --cached run.
+    """
+    if zstandard is None or not 200 <= response.status_code < 300 or not response.content:
+        return
+    os.makedirs(PAGE_CACHE_DIR, exist_ok=True)
+    path = _page_cache_path(athlete_id)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(zstandard.ZstdCompressor(level=10).compress(response.content))
+    os.replace(tmp_path, path)
+
+
+def load_cached_page(athlete_id: int) -> Optional[bytes]:
+    """Return the raw body of a previously fetched page, or None if it is not cached"""
+    if zstandard is None:
+        return None
+    try:
+        with open(_page_cache_path(athlete_id), 'rb') as f:
+            return zstandard.ZstdDecompressor().decompress(f.read())
+    except FileNotFoundError:
+        return None
@@ -13,28 +13,131 @@ import csv
 import os
 import sys
 from datetime import datetime
+from operator import itemgetter
 
 DB_PATH = "athletics_stats.db"
 SCRAPED_DATA_DIR = "scraped_data"
+IO_BUFFER_SIZE = 1 << 20  # 1 MiB read buffers for the scraped CSV files
+IMPORT_BATCH_SIZE = 5000  # result rows per executemany
+MAX_PRINTED_ERRORS = 10  # per file, the rest only go to ERROR_LOG_PATH
+ERROR_LOG_PATH = "import_errors.log"
+
+# Bulk import settings: WAL + relaxed fsync, 256MB page cache, in-memory temp tables
+CONNECTION_PRAGMAS = """
+    PRAGMA journal_mode = WAL;
+    PRAGMA synchronous = NORMAL;
+    PRAGMA temp_store = MEMORY;
+    PRAGMA cache_size = -262144;
+"""
+
+# CSV columns read by the importers; missing columns read as None unless defaulted
+ATHLETE_COLUMNS = ('id', 'name', 'birth_date')
+RESULT_COLUMNS = (
+    'athlete_id', 'event', 'club', 'venue', 'competition', 'date',
+    'is_outdoor', 'is_approved', 'year', 'age',
+    'result', 'wind', 'placement', 'rejection_reason',
+)
+RESULT_DEFAULTS = {'is_outdoor': 'True', 'is_approved': 'True'}
+
+
+class _BoolFlags(dict):
+    """'True'/'False' CSV flags -> 1/0; spellings not listed fall back to a case-insensitive compare"""
+
+    def __missing__(self, value):
+        return 1 if value.lower() == 'true' else 0
+
+
+BOOL_FLAGS = _BoolFlags({'True': 1, 'False': 0, 'true': 1, 'false': 0})
+
+# ImportCache get-or-create statements, built once so every miss reuses the
+# same prepared statement
+INSERT_NAME_SQL = {
+    table: f"""
+        INSERT INTO {table} (name) VALUES (?)
+        ON CONFLICT(name) DO UPDATE SET name = excluded.name
+        RETURNING id
+    """
+    for table in ('clubs', 'events', 'venues')
+}
+
+# NULL date/venue_id never conflict, so those always get a new row,
+# as INSERT OR IGNORE did; the cache keeps it from happening twice
+INSERT_COMPETITION_SQL = """
+    INSERT INTO competitions (name, date, venue_id, year)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(name, date, venue_id) DO UPDATE SET name = excluded.name
+    RETURNING id
+"""
+
+INSERT_ATHLETE_SQL = """
+    INSERT OR IGNORE INTO athletes (id, name, birth_date)
+    VALUES (?, ?, ?)
+"""
+
+INSERT_RESULT_SQL = """
+    INSERT OR IGNORE INTO results (
+        athlete_id, event_id, club_id, competition_id,
+        result, wind, year, age, date, placement,
+        is_outdoor, is_approved, rejection_reason,
+        source_athlete_id
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Picks UNIQUE(athlete_id, event_id, date, result, placement, is_outdoor)
+# out of the INSERT_RESULT_SQL parameters
+RESULT_KEY = itemgetter(0, 1, 8, 4, 9, 10)
 
 
 def get_connection():
     """Get database connection"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, cached_statements=256)
     conn.row_factory = sqlite3.Row
+    conn.executescript(CONNECTION_PRAGMAS)
     conn.execute("PRAGMA foreign_keys = ON")
     return conn
 
 
+def drop_results_indexes(conn):
+    """
+    Drop the non-unique indexes on results before the bulk load, recording their
+    DDL in deferred_indexes (shared with comprehensive_scraper.py) so an
+    interrupted import can still be repaired. UNIQUE indexes stay for dedup.
+    """
+    conn.execute("CREATE TABLE IF NOT EXISTS deferred_indexes (name TEXT PRIMARY KEY, sql TEXT NOT NULL)")
+    indexes = conn.execute("""
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'index' AND tbl_name = 'results'
+          AND sql IS NOT NULL AND sql NOT LIKE 'CREATE UNIQUE%'
+    """).fetchall()
+    for name, sql in indexes:
+        conn.execute("INSERT OR REPLACE INTO deferred_indexes (name, sql) VALUES (?, ?)", (name, sql))
+        conn.execute(f'DROP INDEX "{name}"')
+    conn.commit()
+    return [name for name, _ in indexes]
+
+
+def restore_deferred_indexes(conn):
+    """Recreate the indexes dropped by drop_results_indexes, including earlier interrupted runs"""
+    indexes = conn.execute("SELECT name, sql FROM deferred_indexes").fetchall()
+    for name, sql in indexes:
+        conn.execute(sql)
+        conn.execute("DELETE FROM deferred_indexes WHERE name = ?", (name,))
+        conn.commit()
+    return [name for name, _ in indexes]
+
+
 class ImportCache:
     """Cache for normalized table lookups during import"""
 
     def __init__(self, conn):
         self.conn = conn
+        self._cursor = conn.cursor()  # reused by every cache miss
         self.clubs = {}
         self.events = {}
         self.venues = {}
         self.competitions = {}
+        self._years = {}  # date -> year for new competitions
+        self.result_keys = set()  # RESULT_KEY of every stored result
         self._load_existing()
 
     def _load_existing(self):
@@ -49,83 +152,139 @@ class ImportCache:
             key = (row['name'], row['date'], row['venue_id'])
             self.competitions[key] = row['id']
 
+        # Rows with a NULL in the key never conflict, so only complete keys are kept
+        cursor.row_factory = None
+        self.result_keys.update(cursor.execute("""
+            SELECT athlete_id, event_id, date, result, placement, is_outdoor
+            FROM results WHERE date IS NOT NULL AND placement IS NOT NULL
+        """))
+
+    def _insert_returning_id(self, table, name):
+        """Insert a name (or find the existing row) and return its id row in one statement"""
+        return self._cursor.execute(INSERT_NAME_SQL[table], (name,)).fetchone()
+
     def get_or_create_club(self, name):
-        if not name or name.strip() == '':
+        # One strip and one dict probe on the hit path
+        name = name.strip() if name else None
+        if not name:
             return None
-        name = name.strip()
-        if name in self.clubs:
-            return self.clubs[name]
-        cursor = self.conn.cursor()
-        cursor.execute("INSERT OR IGNORE INTO clubs (name) VALUES (?)", (name,))
-        cursor.execute("SELECT id FROM clubs WHERE name = ?", (name,))
-        row = cursor.fetchone()
+        cached = self.clubs.get(name)
+        if cached is not None:
+            return cached
+        row = self._insert_returning_id("clubs", name)
         if row:
             self.clubs[name] = row['id']
             return row['id']
         return None
 
     def get_or_create_event(self, name):
-        if not name or name.strip() == '':
+        name = name.strip() if name else None
+        if not name:
             return None
-        name = name.strip()
-        if name in self.events:
-            return self.events[name]
-        cursor = self.conn.cursor()
-        cursor.execute("INSERT OR IGNORE INTO events (name) VALUES (?)", (name,))
-        cursor.execute("SELECT id FROM events WHERE name = ?", (name,))
-        row = cursor.fetchone()
+        cached = self.events.get(name)
+        if cached is not None:
+            return cached
+        row = self._insert_returning_id("events", name)
         if row:
             self.events[name] = row['id']
             return row['id']
         return None
 
     def get_or_create_venue(self, name):
-        if not name or name.strip() == '':
+        name = name.strip() if name else None
+        if not name:
             return None
-        name = name.strip()
-        if name in self.venues:
-            return self.venues[name]
-        cursor = self.conn.cursor()
-        cursor.execute("INSERT OR IGNORE INTO venues (name) VALUES (?)", (name,))
-        cursor.execute("SELECT id FROM venues WHERE name = ?", (name,))
-        row = cursor.fetchone()
+        cached = self.venues.get(name)
+        if cached is not None:
+            return cached
+        row = self._insert_returning_id("venues", name)
         if row:
             self.venues[name] = row['id']
             return row['id']
         return None
 
     def get_or_create_competition(self, name, date, venue_id):
-        if not name or name.strip() == '':
+        name = name.strip() if name else None
+        if not name:
             return None
-        name = name.strip()
         key = (name, date, venue_id)
-        if key in self.competitions:
-            return self.competitions[key]
+        cached = self.competitions.get(key)
+        if cached is not None:
+            return cached
 
-        year = None
-        if date:
+        year = self._years.get(date)
+        if year is None and date and date not in self._years:
+            # Dates are ISO (YYYY-MM-DD), so the year is the first four characters
             try:
-                year = int(date.split('-')[0])
+                year = int(date[:4])
             except:
                 pass
+            self._years[date] = year
 
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT OR IGNORE INTO competitions (name, date, venue_id, year)
-            VALUES (?, ?, ?, ?)
-        """, (name, date, venue_id, year))
-        cursor.execute("""
-            SELECT id FROM competitions
-            WHERE name = ? AND (date = ? OR (date IS NULL AND ? IS NULL))
-            AND (venue_id = ? OR (venue_id IS NULL AND ? IS NULL))
-        """, (name, date, date, venue_id, venue_id))
-        row = cursor.fetchone()
+        row = self._cursor.execute(
+            INSERT_COMPETITION_SQL, (name, date, venue_id, year)
+        ).fetchone()
         if row:
             self.competitions[key] = row['id']
             return row['id']
         return None
 
 
+class ImportErrors:
+    """
+    Collects the row errors of one CSV file: the first MAX_PRINTED_ERRORS are
+    printed, every error is appended to ERROR_LOG_PATH, so a broken file
+    cannot flood the console.
+    """
+
+    def __init__(self, filepath):
+        self.filename = os.path.basename(filepath)
+        self.count = 0
+        self._log = None
+
+    def add(self, message):
+        self.count += 1
+        if self.count <= MAX_PRINTED_ERRORS:
+            print(message)
+        elif self.count == MAX_PRINTED_ERRORS + 1:
+            print(f"  ... further errors in {self.filename} only written to {ERROR_LOG_PATH}")
+        if self._log is None:
+            self._log = open(ERROR_LOG_PATH, 'a', encoding='utf-8')
+        self._log.write(f"{self.filename}: {message}\n")
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+        if self.count > MAX_PRINTED_ERRORS:
+            print(f"  {self.count} errors in {self.filename}, see {ERROR_LOG_PATH}")
+
+
+def _select_columns(reader, header, columns, defaults=None):
+    """
+    Yield (values, row) for each record of a csv.reader positioned after the
+    header, values holding the given columns in order. Matches csv.DictReader:
+    blank lines are skipped and short rows padded with None.
+    """
+    width = len(header)
+    index = {name: i for i, name in enumerate(header)}
+    defaults = defaults or {}
+    # Columns missing from the header read from slots appended to each row
+    missing = [name for name in columns if name not in index]
+    for i, name in enumerate(missing):
+        index[name] = width + i
+    tail = [defaults.get(name) for name in missing]
+    get = itemgetter(*(index[name] for name in columns))
+
+    for row in reader:
+        if not row:
+            continue
+        if len(row) != width:
+            row = (row + [None] * width)[:width]
+        if tail:
+            row.extend(tail)
+        yield get(row), row
+
+
 def import_athletes_csv(conn, filepath):
     """Import athletes from CSV"""
     if not os.path.exists(filepath):
@@ -133,24 +292,24 @@ def import_athletes_csv(conn, filepath):
 
     count = 0
     cursor = conn.cursor()
+    errors = ImportErrors(filepath)
 
-    with open(filepath, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
+    with open(filepath, 'r', encoding='utf-8', buffering=IO_BUFFER_SIZE) as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        for (athlete_id, name, birth_date), _ in _select_columns(reader, header, ATHLETE_COLUMNS):
             try:
-                cursor.execute("""
-                    INSERT OR IGNORE INTO athletes (id, name, birth_date)
-                    VALUES (?, ?, ?)
-                """, (
-                    int(row['id']),
-                    row['name'],
-                    row.get('birth_date') or None
+                cursor.execute(INSERT_ATHLETE_SQL, (
+                    int(athlete_id),
+                    name,
+                    birth_date or None
                 ))
                 count += 1
             except Exception as e:
-                print(f"Error importing athlete: {e}")
+                errors.add(f"Error importing athlete: {e}")
 
     conn.commit()
+    errors.close()
     return count
 
 
@@ -161,51 +320,96 @@ def import_results_csv(conn, cache, filepath):
 
     count = 0
     cursor = conn.cursor()
-
-    with open(filepath, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
+    batch = []  # (params, row) pairs, flushed with one executemany
+    result_keys = cache.result_keys
+    errors = ImportErrors(filepath)
+
+    with open(filepath, 'r', encoding='utf-8', buffering=IO_BUFFER_SIZE) as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        for values, row in _select_columns(reader, header, RESULT_COLUMNS, RESULT_DEFAULTS):
+            (athlete_id, event, club, venue, competition, date,
+             is_outdoor, is_approved, year, age,
+             result, wind, placement, rejection_reason) = values
             try:
-                athlete_id = int(row['athlete_id'])
-                event_id = cache.get_or_create_event(row.get('event'))
-                club_id = cache.get_or_create_club(row.get('club'))
-                venue_id = cache.get_or_create_venue(row.get('venue'))
-                competition_id = cache.get_or_create_competition(
-                    row.get('competition'),
-                    row.get('date'),
-                    venue_id
-                )
+                athlete_id = int(athlete_id)
+                event_id = cache.get_or_create_event(event)
+                club_id = cache.get_or_create_club(club)
+                venue_id = cache.get_or_create_venue(venue)
+                competition_id = cache.get_or_create_competition(competition, date, venue_id)
 
                 # Parse boolean values
-                is_outdoor = row.get('is_outdoor', 'True').lower() == 'true'
-                is_approved = row.get('is_approved', 'True').lower() == 'true'
+                is_outdoor = BOOL_FLAGS[is_outdoor]
+                is_approved = BOOL_FLAGS[is_approved]
 
                 # Parse numeric values
-                year = int(row['year']) if row.get('year') else None
-                age = int(row['age']) if row.get('age') else None
-
-                cursor.execute("""
-                    INSERT OR IGNORE INTO results (
-                        athlete_id, event_id, club_id, competition_id,
-                        result, wind, year, age, date, placement,
-                        is_outdoor, is_approved, rejection_reason,
-                        source_athlete_id
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
+                year = int(year) if year else None
+                age = int(age) if age else None
+
+                params = (
                     athlete_id, event_id, club_id, competition_id,
-                    row.get('result'), row.get('wind'),
-                    year, age, row.get('date'), row.get('placement'),
-                    1 if is_outdoor else 0,
-                    1 if is_approved else 0,
-                    row.get('rejection_reason') or None,
+                    result, wind,
+                    year, age, date, placement,
+                    is_outdoor,
+                    is_approved,
+                    rejection_reason or None,
                     athlete_id
-                ))
-                count += 1
+                )
+
+                # Skip rows INSERT OR IGNORE would drop as duplicates. Keys with a
+                # NULL (or a NULL year, which SQLite ignores) are left to SQLite.
+                key = RESULT_KEY(params)
+                if year is not None and None not in key:
+                    if key in result_keys:
+                        count += 1
+                        continue
+                    result_keys.add(key)
+
+                batch.append((params, row))
 
             except Exception as e:
-                print(f"Error importing result: {e} - Row: {row}")
+                errors.add(f"Error importing result: {e} - Row: {dict(zip(header, row))}")
 
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                count += _insert_results(cursor, batch, header, result_keys, errors)
+                batch.clear()
+
+    count += _insert_results(cursor, batch, header, result_keys, errors)
     conn.commit()
+    errors.close()
+    return count
+
+
+def _insert_results(cursor, batch, header, result_keys, errors):
+    """
+    Insert a batch of (params, csv row) pairs with one executemany, return rows inserted.
+    A row the batch cannot take (e.g. a foreign key error) rolls the batch back
+    and it is retried row by row, so only the bad rows are skipped (and their
+    keys dropped from result_keys again).
+    """
+    if not batch:
+        return 0
+    # Outside a transaction the SAVEPOINT would open its own and RELEASE would
+    # commit it, so keep the batch inside the file's transaction
+    if not cursor.connection.in_transaction:
+        cursor.execute("BEGIN")
+    cursor.execute("SAVEPOINT import_batch")
+    try:
+        cursor.executemany(INSERT_RESULT_SQL, [params for params, _ in batch])
+        cursor.execute("RELEASE import_batch")
+        return len(batch)
+    except sqlite3.Error:
+        cursor.execute("ROLLBACK TO import_batch")
+        cursor.execute("RELEASE import_batch")
+
+    count = 0
+    for params, row in batch:
+        try:
+            cursor.execute(INSERT_RESULT_SQL, params)
+            count += 1
+        except Exception as e:
+            result_keys.discard(RESULT_KEY(params))
+            errors.add(f"Error importing result: {e} - Row: {dict(zip(header, row))}")
     return count
 
 
@@ -228,11 +432,18 @@ def main():
         return
 
     print(f"\nFound {len(athlete_files)} athlete files and {len(result_files)} result files")
+    if os.path.exists(ERROR_LOG_PATH):
+        os.remove(ERROR_LOG_PATH)
     print("=" * 60)
 
     conn = get_connection()
     cache = ImportCache(conn)
 
+    # Build the results indexes once after the load instead of on every insert
+    dropped = drop_results_indexes(conn)
+    if dropped:
+        print(f"Dropped {len(dropped)} results indexes for the bulk load")
+
     # Import athletes first
     total_athletes = 0
     for filename in athlete_files:
@@ -249,6 +460,11 @@ def main():
         print(f"  Imported {count} results from {filename}")
         total_results += count
 
+    rebuilt = restore_deferred_indexes(conn)
+    if rebuilt:
+        print(f"Rebuilt {len(rebuilt)} results indexes")
+    conn.execute("ANALYZE results")
+    conn.commit()
     conn.close()
 
     print("=" * 60)
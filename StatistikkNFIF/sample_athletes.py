@@ -3,14 +3,38 @@ Sample athlete data fetcher
 Fetches HTML from diverse athletes to identify edge cases before full scrape
 """
 
-import requests
-import time
+from concurrent.futures import ThreadPoolExecutor
 import os
+import re
+
+from fetching import RateLimiter, make_session, throttled_request
 
 # Create output directory
 OUTPUT_DIR = "sample_html"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+FETCH_WORKERS = 4
+REQUEST_INTERVAL = 0.5  # Minimum seconds between request starts, across all workers
+
+# Patterns for the quick classification in extract_basic_info, matched
+# against the raw UTF-8 page
+ATHLETE_MARKER = b'<div id="athlete">'
+NAME_RE = re.compile(rb'<h2>([^<]+)</h2>')
+BIRTH_RE = re.compile('Født: ([^<]+)</h3>'.encode())
+EVENT_RE = re.compile(rb'<div id="eventheader"><h3>([^<]+)')
+ROW_RE = re.compile(rb'<tr>\s*<td>')
+SECTION_FLAGS = {
+    "UTENDØRS".encode(): "has_outdoor",
+    "INNENDØRS".encode(): "has_indoor",
+    b"Ikke godkjente resultater": "has_disqualified",
+}
+SECTION_RE = re.compile(b'|'.join(SECTION_FLAGS))
+
+# One keep-alive session for every sample fetch, with retries on connection
+# failures and gateway errors
+SESSION = make_session(FETCH_WORKERS)
+rate_limiter = RateLimiter(REQUEST_INTERVAL)
+
 # Diverse sample of athlete IDs to test
 # Mix of old/new, different event types expected
 SAMPLE_ATHLETES = [
@@ -48,8 +72,8 @@ SAMPLE_ATHLETES = [
     45000,
 ]
 
-def fetch_athlete_results(athlete_id: int) -> str:
-    """Fetch all results for an athlete using POST request"""
+def fetch_athlete_results(athlete_id: int) -> bytes:
+    """Fetch all results for an athlete using POST request, as the raw UTF-8 page"""
     url = "https://www.minfriidrettsstatistikk.info/php/UtoverStatistikk.php"
 
     data = {
@@ -57,18 +81,13 @@ def fetch_athlete_results(athlete_id: int) -> str:
         "type": "RES"  # All results
     }
 
-    headers = {
-        "Content-Type": "application/x-www-form-urlencoded",
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
-    }
-
-    response = requests.post(url, data=data, headers=headers)
-    response.encoding = 'utf-8'
+    # Be nice to the server
+    response = throttled_request(SESSION, rate_limiter, 'POST', url, data=data, timeout=30)
 
-    return response.text
+    return response.content
 
 
-def extract_basic_info(html: str) -> dict:
+def extract_basic_info(html: bytes) -> dict:
     """Quick extraction of basic info to identify what type of athlete this is"""
     info = {
         "has_name": False,
@@ -81,30 +100,30 @@ def extract_basic_info(html: str) -> dict:
         "approximate_results": 0
     }
 
+    # Unknown IDs return a bare page, nothing else to look for
+    if ATHLETE_MARKER not in html:
+        return info
+
     # Check for name
-    if '<div id="athlete">' in html:
-        info["has_name"] = True
-        # Simple extraction
-        import re
-        name_match = re.search(r'<h2>([^<]+)</h2>', html)
-        if name_match:
-            info["name"] = name_match.group(1)
-
-        birth_match = re.search(r'Født: ([^<]+)</h3>', html)
-        if birth_match:
-            info["birth_date"] = birth_match.group(1)
-
-    # Check sections
-    info["has_outdoor"] = "UTENDØRS" in html
-    info["has_indoor"] = "INNENDØRS" in html
-    info["has_disqualified"] = "Ikke godkjente resultater" in html
+    info["has_name"] = True
+    # Simple extraction
+    name_match = NAME_RE.search(html)
+    if name_match:
+        info["name"] = name_match.group(1).decode('utf-8')
+
+    birth_match = BIRTH_RE.search(html)
+    if birth_match:
+        info["birth_date"] = birth_match.group(1).decode('utf-8')
+
+    # Check sections in one scan over the page
+    for match in SECTION_RE.finditer(html):
+        info[SECTION_FLAGS[match.group()]] = True
 
     # Extract event names
-    event_matches = re.findall(r'<div id="eventheader"><h3>([^<]+)', html)
-    info["events"] = list(set(event_matches))
+    info["events"] = [event.decode('utf-8') for event in set(EVENT_RE.findall(html))]
 
     # Count approximate results (count table rows)
-    info["approximate_results"] = html.count("<tr><td>")
+    info["approximate_results"] = sum(1 for _ in ROW_RE.finditer(html))
 
     return info
 
@@ -116,36 +135,37 @@ def main():
 
     results_summary = []
 
-    for athlete_id in SAMPLE_ATHLETES:
-        print(f"\nFetching athlete ID: {athlete_id}...", end=" ")
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+        futures = [executor.submit(fetch_athlete_results, athlete_id) for athlete_id in SAMPLE_ATHLETES]
 
-        try:
-            html = fetch_athlete_results(athlete_id)
+        # Report in sample order while later pages are still downloading
+        for athlete_id, future in zip(SAMPLE_ATHLETES, futures):
+            print(f"\nFetching athlete ID: {athlete_id}...", end=" ")
 
-            # Save raw HTML
-            filepath = os.path.join(OUTPUT_DIR, f"athlete_{athlete_id}.html")
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(html)
+            try:
+                html = future.result()
 
-            # Extract basic info
-            info = extract_basic_info(html)
-            info["id"] = athlete_id
-            info["file"] = filepath
-            info["html_size"] = len(html)
+                # Save raw HTML
+                filepath = os.path.join(OUTPUT_DIR, f"athlete_{athlete_id}.html")
+                with open(filepath, 'wb') as f:
+                    f.write(html)
 
-            results_summary.append(info)
+                # Extract basic info
+                info = extract_basic_info(html)
+                info["id"] = athlete_id
+                info["file"] = filepath
+                info["html_size"] = len(html)
 
-            if info["has_name"]:
-                print(f"✓ {info['name']} - {len(info['events'])} events, ~{info['approximate_results']} results")
-            else:
-                print("✗ Empty/Invalid")
+                results_summary.append(info)
 
-            # Be nice to the server
-            time.sleep(0.5)
+                if info["has_name"]:
+                    print(f"✓ {info['name']} - {len(info['events'])} events, ~{info['approximate_results']} results")
+                else:
+                    print("✗ Empty/Invalid")
 
-        except Exception as e:
-            print(f"✗ Error: {e}")
-            results_summary.append({"id": athlete_id, "error": str(e)})
+            except Exception as e:
+                print(f"✗ Error: {e}")
+                results_summary.append({"id": athlete_id, "error": str(e)})
 
     # Print summary
     print("\n" + "=" * 60)
@@ -1,18 +1,42 @@
 """
 Main scraper for Norwegian Athletics Statistics
 Fetches ALL results for ALL athletes and exports to CSV for Supabase import
+
+Usage:
+    python scrape_all_results.py            # Batch CSV files
+    python scrape_all_results.py --parquet  # Batch Parquet files (needs pyarrow)
+    python scrape_all_results.py --cached   # Re-parse cached pages, fetch only missing ones
+
+Fetched pages are kept zstd-compressed in fetching.PAGE_CACHE_DIR (needs zstandard),
+so a parser change can be re-run with --cached after removing the progress database.
 """
 
-import requests
 import json
 import csv
 import os
 import re
-import time
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from dataclasses import dataclass, field
 from datetime import datetime
-from bs4 import BeautifulSoup
+from functools import lru_cache
+from itertools import repeat
 from typing import Optional, Dict, List, Tuple
 import logging
+from html import unescape
+
+from fetching import (
+    RateLimiter, fetch_in_order, load_cached_page, make_parse_pool, make_session, save_cached_page,
+    throttled_request, zstandard,
+)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None  # Parquet output disabled
 
 # Setup logging
 logging.basicConfig(
@@ -28,14 +52,92 @@ logger = logging.getLogger(__name__)
 # Configuration
 OUTPUT_DIR = "scraped_data"
 ATHLETE_IDS_FILE = "athlete_search_html/_all_athlete_ids.json"
-DELAY_BETWEEN_REQUESTS = 0.2  # seconds
+PROGRESS_DB = os.path.join(OUTPUT_DIR, "_progress.db")  # athletes already written to a batch file
+CHECKPOINT_FILE = os.path.join(OUTPUT_DIR, "_checkpoint.json")  # index-based progress of older runs
+DELAY_BETWEEN_REQUESTS = 0.2  # seconds, minimum spacing across all fetch threads
+MAX_DELAY_BETWEEN_REQUESTS = 10.0  # seconds, upper bound while the server pushes back
+FETCH_WORKERS = 8  # concurrent athlete page fetches
+PARSE_WORKERS = os.cpu_count() or 1  # processes parsing fetched pages
 BATCH_SIZE = 1000  # Save progress every N athletes
+IO_BUFFER_SIZE = 1 << 20  # 1 MiB write buffers for the batch CSV files
+
+# Column order of the batch CSV files
+ATHLETE_FIELDS = ['id', 'name', 'birth_date']
+RESULT_FIELDS = [
+    'event', 'is_outdoor', 'year', 'age',
+    'result', 'wind', 'placement', 'club', 'date',
+    'venue', 'competition', 'is_approved', 'rejection_reason'
+]
+
+if pa is not None:
+    # Repetitive text columns are dictionary encoded
+    ATHLETES_SCHEMA = pa.schema([
+        ('id', pa.int32()),
+        ('name', pa.string()),
+        ('birth_date', pa.string()),
+    ])
+    RESULTS_SCHEMA = pa.schema([
+        ('athlete_id', pa.int32()),
+        ('event', pa.dictionary(pa.int32(), pa.string())),
+        ('is_outdoor', pa.bool_()),
+        ('year', pa.int16()),
+        ('age', pa.int16()),
+        ('result', pa.string()),
+        ('wind', pa.string()),
+        ('placement', pa.string()),
+        ('club', pa.dictionary(pa.int32(), pa.string())),
+        ('date', pa.string()),
+        ('venue', pa.dictionary(pa.int32(), pa.string())),
+        ('competition', pa.dictionary(pa.int32(), pa.string())),
+        ('is_approved', pa.bool_()),
+        ('rejection_reason', pa.dictionary(pa.int32(), pa.string())),
+    ])
+
+# Present on every page of an existing athlete; unknown IDs return a bare page without it
+ATHLETE_MARKER = b'<div id="athlete">'
+
+# The page is flat server-generated markup: the athlete header, then per
+# section/event a header div, an optional 'Ikke godkjente' h4 and a results
+# table. One scan over the raw bytes finds these in document order; a table
+# runs from its match to the next TABLE_END. Cells hold plain text, and the
+# site leaves some <td> unclosed, so a cell ends at the next tag.
+ATHLETE_RE = re.compile(rb'<div id="athlete">(.*?)</div>', re.S)
+NAME_RE = re.compile(rb'<h2>([^<]*)')
+BIRTH_TAG_RE = re.compile(rb'<h3>([^<]*)')
+SCAN_RE = re.compile(
+    rb'<(?:div id="header2"><h2>(?P<section>[^<]*)'
+    rb'|div id="eventheader"><h3>(?P<event>[^<]*)'
+    rb'|h4>(?P<h4>[^<]*)'
+    rb'|(?P<table>table))'
+)
+TABLE_END = b'</table>'
+CELL_RE = re.compile(rb'<td([^>]*)>([^<]*)')
+TITLE_RE = re.compile(rb'title="([^"]*)"')
+
+# Precompiled patterns for the per-result parsing helpers
+BIRTH_RE = re.compile(r'(\d{2})\.(\d{2})\.(\d{4})')
+YEAR_AGE_RE = re.compile(r'(\d{4})(?:\s*\((\d+)\))?')
+RESULT_WIND_RE = re.compile(r'(.+?)\(([+-]?\d+[,.]?\d*)\)$')
+
+# Canonical copies of the text values that repeat across results (events,
+# clubs, venues, competitions), so each distinct value is stored once
+INTERN_CACHE: Dict[str, str] = {}
+# The AthleteResults columns holding those values
+INTERNED_COLUMNS = ('event', 'club', 'venue', 'competition', 'rejection_reason')
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# One pooled session and rate limiter shared by all fetch threads
+SESSION = make_session(FETCH_WORKERS)
+rate_limiter = RateLimiter(DELAY_BETWEEN_REQUESTS, MAX_DELAY_BETWEEN_REQUESTS)
 
-def fetch_athlete_results(athlete_id: int) -> str:
-    """Fetch ALL results for an athlete"""
+
+def fetch_athlete_results(athlete_id: int) -> bytes:
+    """
+    Fetch ALL results for an athlete (throttling and retries are handled by
+    throttled_request) and keep it in the page cache. Returns the raw UTF-8 body;
+    the parser reads the bytes directly.
+    """
     url = "https://www.minfriidrettsstatistikk.info/php/UtoverStatistikk.php"
 
     data = {
@@ -43,17 +145,66 @@ def fetch_athlete_results(athlete_id: int) -> str:
         "type": "RES"  # All results
     }
 
-    headers = {
-        "Content-Type": "application/x-www-form-urlencoded",
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
-    }
+    response = throttled_request(SESSION, rate_limiter, 'POST', url, data=data, timeout=30)
+    # An error page would parse as an empty athlete and be marked done
+    response.raise_for_status()
+    save_cached_page(athlete_id, response)
+
+    return response.content
+
+
+@dataclass
+class AthleteResults:
+    """All results of one athlete as parallel columns, one list per RESULT_FIELDS entry"""
+    event: List[str] = field(default_factory=list)
+    is_outdoor: List[bool] = field(default_factory=list)
+    year: List[Optional[int]] = field(default_factory=list)
+    age: List[Optional[int]] = field(default_factory=list)
+    result: List[str] = field(default_factory=list)
+    wind: List[Optional[str]] = field(default_factory=list)
+    placement: List[str] = field(default_factory=list)
+    club: List[str] = field(default_factory=list)
+    date: List[Optional[str]] = field(default_factory=list)
+    venue: List[str] = field(default_factory=list)
+    competition: List[str] = field(default_factory=list)
+    is_approved: List[bool] = field(default_factory=list)
+    rejection_reason: List[Optional[str]] = field(default_factory=list)
 
-    response = requests.post(url, data=data, headers=headers, timeout=30)
-    response.encoding = 'utf-8'
+    def __len__(self) -> int:
+        return len(self.event)
 
-    return response.text
+    def columns(self) -> List[list]:
+        """The column lists in RESULT_FIELDS order"""
+        return [getattr(self, name) for name in RESULT_FIELDS]
 
 
+def intern(text: str) -> str:
+    """Return the canonical copy of a repeated text value"""
+    return INTERN_CACHE.setdefault(text, text)
+
+
+def intern_results(results: AthleteResults):
+    """
+    Swap the repeated values of results for this process's canonical copies.
+    A page parsed in a worker process was interned against that worker's
+    cache, so its strings arrive as fresh copies after unpickling.
+    """
+    for name in INTERNED_COLUMNS:
+        column = getattr(results, name)
+        column[:] = [value if value is None else intern(value) for value in column]
+
+
+def _text(raw: bytes, strip: bool = True) -> str:
+    """Text of a captured markup fragment, decoded and (by default) stripped"""
+    text = raw.decode('utf-8')
+    if strip:
+        text = text.strip()
+    return unescape(text) if '&' in text else text
+
+
+# The per-row helpers below see the same few thousand dates, year/age
+# cells and marks over and over, so their results are cached
+@lru_cache(maxsize=65536)
 def parse_date(date_str: str) -> Optional[str]:
     """Parse date from DD.MM.YY format to YYYY-MM-DD"""
     if not date_str:
@@ -80,7 +231,7 @@ def parse_birth_date(birth_str: str) -> Optional[str]:
     if not birth_str:
         return None
     try:
-        match = re.search(r'(\d{2})\.(\d{2})\.(\d{4})', birth_str)
+        match = BIRTH_RE.search(birth_str)
         if match:
             day, month, year = match.groups()
             return f"{year}-{month}-{day}"
@@ -89,23 +240,23 @@ def parse_birth_date(birth_str: str) -> Optional[str]:
     return None
 
 
+@lru_cache(maxsize=65536)
 def parse_year_age(year_age_str: str) -> Tuple[Optional[int], Optional[int]]:
     """Parse year and age from '2015 (14)' format"""
     if not year_age_str:
         return None, None
     try:
-        match = re.match(r'(\d{4})\s*\((\d+)\)', year_age_str.strip())
-        if match:
-            return int(match.group(1)), int(match.group(2))
-        # Try just year
-        match = re.match(r'(\d{4})', year_age_str.strip())
+        # Year with optional '(age)'
+        match = YEAR_AGE_RE.match(year_age_str.strip())
         if match:
-            return int(match.group(1)), None
+            year, age = match.groups()
+            return int(year), int(age) if age else None
     except:
         pass
     return None, None
 
 
+@lru_cache(maxsize=65536)
 def parse_result_wind(result_str: str) -> Tuple[str, Optional[str]]:
     """
     Parse result and wind from formats like:
@@ -119,34 +270,36 @@ def parse_result_wind(result_str: str) -> Tuple[str, Optional[str]]:
     result_str = result_str.strip()
 
     # Check for wind in parentheses
-    match = re.match(r'(.+?)\(([+-]?\d+[,.]?\d*)\)$', result_str)
+    match = RESULT_WIND_RE.match(result_str)
     if match:
         return match.group(1), match.group(2)
 
     return result_str, None
 
 
-def parse_athlete_page(html: str, athlete_id: int) -> Dict:
+def parse_athlete_page(html: bytes, athlete_id: int) -> Dict:
     """Parse athlete page HTML and extract all data"""
-    soup = BeautifulSoup(html, 'html.parser')
-
     data = {
         'athlete_id': athlete_id,
         'name': None,
         'birth_date': None,
-        'results': []
+        'results': AthleteResults()
     }
 
+    # Unknown IDs are common, don't scan their empty pages
+    if ATHLETE_MARKER not in html:
+        return data
+
     # Extract athlete name
-    athlete_div = soup.find('div', id='athlete')
-    if athlete_div:
-        name_tag = athlete_div.find('h2')
-        if name_tag:
-            data['name'] = name_tag.get_text(strip=True)
+    athlete_div = ATHLETE_RE.search(html)
+    if athlete_div is not None:
+        name_tag = NAME_RE.search(athlete_div.group(1))
+        if name_tag is not None:
+            data['name'] = _text(name_tag.group(1))
 
-        birth_tag = athlete_div.find('h3')
-        if birth_tag:
-            data['birth_date'] = parse_birth_date(birth_tag.get_text())
+        birth_tag = BIRTH_TAG_RE.search(athlete_div.group(1))
+        if birth_tag is not None:
+            data['birth_date'] = parse_birth_date(_text(birth_tag.group(1)))
 
     if not data['name']:
         return data  # Empty athlete
@@ -155,159 +308,274 @@ def parse_athlete_page(html: str, athlete_id: int) -> Dict:
     current_section = None  # 'UTENDØRS' or 'INNENDØRS'
     current_event = None
     is_approved_section = True
-
-    # Process all elements in order
-    for element in soup.find_all(['div', 'table', 'h4']):
+    results = data['results']
+
+    # Section/event headers, h4 markers and result tables in document order
+    pos = 0
+    while True:
+        match = SCAN_RE.search(html, pos)
+        if match is None:
+            break
+        pos = match.end()
+        kind = match.lastgroup
         # Check for outdoor/indoor header
-        if element.name == 'div' and element.get('id') == 'header2':
-            h2 = element.find('h2')
-            if h2:
-                text = h2.get_text(strip=True)
-                if 'UTENDØRS' in text:
-                    current_section = 'outdoor'
-                elif 'INNENDØRS' in text:
-                    current_section = 'indoor'
+        if kind == 'section':
+            text = _text(match.group('section'))
+            if 'UTENDØRS' in text:
+                current_section = 'outdoor'
+            elif 'INNENDØRS' in text:
+                current_section = 'indoor'
 
         # Check for event header
-        elif element.name == 'div' and element.get('id') == 'eventheader':
-            h3 = element.find('h3')
-            if h3:
-                current_event = h3.get_text(strip=True)
-                is_approved_section = True  # Reset for new event
+        elif kind == 'event':
+            current_event = intern(_text(match.group('event')))
+            is_approved_section = True  # Reset for new event
 
         # Check for disqualified section
-        elif element.name == 'h4':
-            text = element.get_text(strip=True)
-            if 'Ikke godkjente' in text:
+        elif kind == 'h4':
+            if 'Ikke godkjente' in _text(match.group('h4')):
                 is_approved_section = False
 
         # Process results table
-        elif element.name == 'table' and current_event and current_section:
-            rows = element.find_all('tr')
+        else:
+            end = html.find(TABLE_END, pos)
+            pos = len(html) if end < 0 else end + len(TABLE_END)
+            if not (current_event and current_section):
+                continue
+            is_outdoor = current_section == 'outdoor'
 
-            for row in rows:
-                cells = row.find_all('td')
-                if not cells:
-                    continue
+            for row in html[match.start():pos].split(b'<tr')[1:]:
+                cells = CELL_RE.findall(row)
 
                 # Determine if this is a 6-column (approved) or 7-column (rejected) row
-                if len(cells) >= 6:
-                    year, age = parse_year_age(cells[0].get_text())
-                    result_raw = cells[1].get_text(strip=True)
-                    result, wind = parse_result_wind(result_raw)
-                    placement = cells[2].get_text(strip=True)
-                    club = cells[3].get_text(strip=True)
-                    date_str = cells[4].get_text(strip=True)
-                    date = parse_date(date_str)
-
-                    # Location - get title attribute for full venue name
-                    location_cell = cells[5]
-                    venue_full = location_cell.get('title', '')
-                    competition_name = location_cell.get_text(strip=True)
-
-                    # Rejection reason (7th column for disqualified)
-                    rejection_reason = None
-                    if len(cells) >= 7 and not is_approved_section:
-                        rejection_reason = cells[6].get_text(strip=True)
-
-                    result_data = {
-                        'event': current_event,
-                        'is_outdoor': current_section == 'outdoor',
-                        'year': year,
-                        'age': age,
-                        'result': result,
-                        'wind': wind,
-                        'placement': placement,
-                        'club': club,
-                        'date': date,
-                        'venue': venue_full,
-                        'competition': competition_name,
-                        'is_approved': is_approved_section,
-                        'rejection_reason': rejection_reason
-                    }
-
-                    data['results'].append(result_data)
+                if len(cells) < 6:
+                    continue
 
+                year, age = parse_year_age(_text(cells[0][1]))
+                result, wind = parse_result_wind(_text(cells[1][1]))
+                placement = _text(cells[2][1])
+                club = intern(_text(cells[3][1]))
+                date = parse_date(_text(cells[4][1]))
+
+                # Location - get title attribute for full venue name
+                location_attrs, location_text = cells[5]
+                title = TITLE_RE.search(location_attrs)
+                venue_full = intern(_text(title.group(1), strip=False) if title else '')
+                competition_name = intern(_text(location_text))
+
+                # Rejection reason (7th column for disqualified)
+                rejection_reason = None
+                if len(cells) >= 7 and not is_approved_section:
+                    rejection_reason = intern(_text(cells[6][1]))
+
+                results.event.append(current_event)
+                results.is_outdoor.append(is_outdoor)
+                results.year.append(year)
+                results.age.append(age)
+                results.result.append(result)
+                results.wind.append(wind)
+                results.placement.append(placement)
+                results.club.append(club)
+                results.date.append(date)
+                results.venue.append(venue_full)
+                results.competition.append(competition_name)
+                results.is_approved.append(is_approved_section)
+                results.rejection_reason.append(rejection_reason)
+
+    return data
+
+
+def parse_cached_page(athlete_id: int) -> Optional[Dict]:
+    """Load and parse a cached page in one step, or return None if it is not cached"""
+    html = load_cached_page(athlete_id)
+    return None if html is None else parse_athlete_page(html, athlete_id)
+
+
+def _parse_in_pool(parse_pool: ProcessPoolExecutor, parse, *args) -> Optional[Dict]:
+    """Run a parse function in the pool, interning its results in this process"""
+    data = parse_pool.submit(parse, *args).result()
+    if data is not None:
+        intern_results(data['results'])
     return data
 
 
+def fetch_athlete_data(athlete_id: int, use_cache: bool = False,
+                       parse_pool: Optional[ProcessPoolExecutor] = None) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Fetch and parse one athlete page; runs in the fetch worker threads.
+    With use_cache a page already in the page cache is parsed without fetching.
+    With a parse_pool the page is parsed in a worker process instead of under the GIL;
+    cached pages are also read and decompressed there, so only the result crosses over
+    (and is interned here, so the batch shares one copy of each repeated value).
+    """
+    try:
+        if use_cache:
+            if parse_pool is not None:
+                data = _parse_in_pool(parse_pool, parse_cached_page, athlete_id)
+            else:
+                data = parse_cached_page(athlete_id)
+            if data is not None:
+                return data, None
+        html = fetch_athlete_results(athlete_id)
+        if parse_pool is not None:
+            return _parse_in_pool(parse_pool, parse_athlete_page, html, athlete_id), None
+        return parse_athlete_page(html, athlete_id), None
+    except Exception as e:
+        return None, str(e)
+
+
+def fetch_athletes_concurrently(athlete_ids: List[int], use_cache: bool = False):
+    """
+    Yield (athlete_id, data, error) in input order while the pages are fetched
+    by FETCH_WORKERS threads and parsed by PARSE_WORKERS processes. Only a
+    bounded window is in flight, so the saved progress stays in step with the output.
+    Re-parsing cached pages is CPU bound, so then every parse process gets a thread.
+    """
+    workers = max(FETCH_WORKERS, PARSE_WORKERS) if use_cache else FETCH_WORKERS
+    # The fetch threads are wound down before the pool they submit to
+    with make_parse_pool(PARSE_WORKERS) as parse_pool, \
+            closing(fetch_in_order(fetch_athlete_data, athlete_ids, workers, use_cache, parse_pool)) as fetched:
+        for athlete_id, (data, error) in zip(athlete_ids, fetched):
+            yield athlete_id, data, error
+
+
 def save_to_csv(athletes_data: List[Dict], batch_num: int):
     """Save parsed data to CSV files"""
 
     # Athletes CSV
     athletes_file = os.path.join(OUTPUT_DIR, f"athletes_batch_{batch_num}.csv")
-    with open(athletes_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=['id', 'name', 'birth_date'])
-        writer.writeheader()
-        for athlete in athletes_data:
-            if athlete['name']:
-                writer.writerow({
-                    'id': athlete['athlete_id'],
-                    'name': athlete['name'],
-                    'birth_date': athlete['birth_date']
-                })
+    with open(athletes_file, 'w', newline='', encoding='utf-8', buffering=IO_BUFFER_SIZE) as f:
+        writer = csv.writer(f)
+        writer.writerow(ATHLETE_FIELDS)
+        writer.writerows(
+            (athlete['athlete_id'], athlete['name'], athlete['birth_date'])
+            for athlete in athletes_data
+            if athlete['name']
+        )
 
     # Results CSV
     results_file = os.path.join(OUTPUT_DIR, f"results_batch_{batch_num}.csv")
-    with open(results_file, 'w', newline='', encoding='utf-8') as f:
-        fieldnames = [
-            'athlete_id', 'event', 'is_outdoor', 'year', 'age',
-            'result', 'wind', 'placement', 'club', 'date',
-            'venue', 'competition', 'is_approved', 'rejection_reason'
-        ]
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-
+    with open(results_file, 'w', newline='', encoding='utf-8', buffering=IO_BUFFER_SIZE) as f:
+        writer = csv.writer(f)
+        writer.writerow(['athlete_id'] + RESULT_FIELDS)
         for athlete in athletes_data:
-            for result in athlete['results']:
-                row = {'athlete_id': athlete['athlete_id']}
-                row.update(result)
-                writer.writerow(row)
+            writer.writerows(zip(repeat(athlete['athlete_id']), *athlete['results'].columns()))
 
     logger.info(f"Saved batch {batch_num}: {athletes_file}, {results_file}")
 
 
-def load_progress() -> int:
-    """Load progress from checkpoint file"""
-    checkpoint_file = os.path.join(OUTPUT_DIR, "_checkpoint.json")
-    if os.path.exists(checkpoint_file):
-        with open(checkpoint_file, 'r') as f:
-            data = json.load(f)
-            return data.get('last_index', 0)
-    return 0
+def _columns_to_table(columns: List[list], schema) -> "pa.Table":
+    """Build an Arrow table from column lists in schema order"""
+    return pa.Table.from_arrays(
+        [pa.array(column, type=column_type) for column, column_type in zip(columns, schema.types)],
+        schema=schema,
+    )
+
+
+def save_to_parquet(athletes_data: List[Dict], batch_num: int):
+    """Save parsed data to Snappy-compressed Parquet files"""
+
+    athletes_file = os.path.join(OUTPUT_DIR, f"athletes_batch_{batch_num}.parquet")
+    named = [athlete for athlete in athletes_data if athlete['name']]
+    athletes = _columns_to_table([
+        [athlete['athlete_id'] for athlete in named],
+        [athlete['name'] for athlete in named],
+        [athlete['birth_date'] for athlete in named],
+    ], ATHLETES_SCHEMA)
+    pq.write_table(athletes, athletes_file, compression='snappy')
+
+    results_file = os.path.join(OUTPUT_DIR, f"results_batch_{batch_num}.parquet")
+    columns = [[] for _ in RESULTS_SCHEMA]
+    for athlete in athletes_data:
+        athlete_results = athlete['results']
+        columns[0].extend(repeat(athlete['athlete_id'], len(athlete_results)))
+        for column, values in zip(columns[1:], athlete_results.columns()):
+            column.extend(values)
+    results = _columns_to_table(columns, RESULTS_SCHEMA)
+    pq.write_table(results, results_file, compression='snappy')
+
+    logger.info(f"Saved batch {batch_num}: {athletes_file}, {results_file}")
+
+
+def open_progress() -> sqlite3.Connection:
+    """Open the progress database, one row per athlete saved to a batch file"""
+    conn = sqlite3.connect(PROGRESS_DB, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS scraped (
+            athlete_id INTEGER PRIMARY KEY,
+            batch INTEGER NOT NULL,
+            fetched_at TEXT NOT NULL
+        )
+    """)
+    return conn
+
+
+def load_progress(conn: sqlite3.Connection, athlete_ids: List[int]) -> Tuple[set, int]:
+    """Return the athlete IDs already saved and the last batch number written"""
+    done = {athlete_id for athlete_id, in conn.execute("SELECT athlete_id FROM scraped")}
+    last_batch = conn.execute("SELECT MAX(batch) FROM scraped").fetchone()[0] or 0
 
+    # Carry over the index checkpoint of a run started before the progress database
+    if not done and os.path.exists(CHECKPOINT_FILE):
+        with open(CHECKPOINT_FILE, 'r') as f:
+            last_index = json.load(f).get('last_index', 0)
+        last_batch = -(-last_index // BATCH_SIZE)
+        save_progress(conn, athlete_ids[:last_index], last_batch)
+        done = set(athlete_ids[:last_index])
 
-def save_progress(index: int):
-    """Save progress to checkpoint file"""
-    checkpoint_file = os.path.join(OUTPUT_DIR, "_checkpoint.json")
-    with open(checkpoint_file, 'w') as f:
-        json.dump({'last_index': index, 'timestamp': datetime.now().isoformat()}, f)
+    return done, last_batch
+
+
+def save_progress(conn: sqlite3.Connection, athlete_ids: List[int], batch_num: int):
+    """Mark the athletes of one written batch as done, in a single transaction"""
+    fetched_at = datetime.now().isoformat()
+    conn.execute("BEGIN")
+    conn.executemany(
+        "INSERT OR REPLACE INTO scraped (athlete_id, batch, fetched_at) VALUES (?, ?, ?)",
+        [(athlete_id, batch_num, fetched_at) for athlete_id in athlete_ids]
+    )
+    conn.execute("COMMIT")
 
 
 def main():
+    save_batch = save_to_csv
+    if '--parquet' in sys.argv:
+        if pq is None:
+            logger.error("Parquet output needs pyarrow (pip install pyarrow)")
+            return
+        save_batch = save_to_parquet
+
+    use_cache = '--cached' in sys.argv
+    if use_cache and zstandard is None:
+        logger.warning("zstandard not installed (pip install zstandard) - fetching all pages")
+
     # Load athlete IDs
     logger.info("Loading athlete IDs...")
     with open(ATHLETE_IDS_FILE, 'r') as f:
-        athlete_ids = json.load(f)
+        athlete_ids = [int(athlete_id) for athlete_id in json.load(f)]
 
     total_athletes = len(athlete_ids)
     logger.info(f"Found {total_athletes:,} athletes to scrape")
 
-    # Check for resume point
-    start_index = load_progress()
-    if start_index > 0:
-        logger.info(f"Resuming from index {start_index}")
+    # Skip athletes already saved; failed ones from earlier runs are retried
+    progress_conn = open_progress()
+    done, batch_num = load_progress(progress_conn, athlete_ids)
+    todo = [athlete_id for athlete_id in athlete_ids if athlete_id not in done]
+    if done:
+        logger.info(f"Resuming: {total_athletes - len(todo):,} athletes already saved")
 
     # Process athletes
     batch_data = []
-    batch_num = start_index // BATCH_SIZE
     total_results = 0
 
-    for i, athlete_id in enumerate(athlete_ids[start_index:], start=start_index):
+    athletes = fetch_athletes_concurrently(todo, use_cache)
+    for i, (athlete_id, data, error) in enumerate(athletes, start=total_athletes - len(todo)):
+        if error:
+            logger.error(f"Error processing athlete {athlete_id}: {error}")
+            continue
+
         try:
-            # Fetch and parse
-            html = fetch_athlete_results(int(athlete_id))
-            data = parse_athlete_page(html, int(athlete_id))
             batch_data.append(data)
 
             results_count = len(data['results'])
@@ -321,13 +589,10 @@ def main():
             # Save batch
             if len(batch_data) >= BATCH_SIZE:
                 batch_num += 1
-                save_to_csv(batch_data, batch_num)
-                save_progress(i + 1)
+                save_batch(batch_data, batch_num)
+                save_progress(progress_conn, [athlete['athlete_id'] for athlete in batch_data], batch_num)
                 batch_data = []
 
-            # Rate limiting
-            time.sleep(DELAY_BETWEEN_REQUESTS)
-
         except Exception as e:
             logger.error(f"Error processing athlete {athlete_id}: {e}")
             continue
@@ -335,8 +600,9 @@ def main():
     # Save final batch
     if batch_data:
         batch_num += 1
-        save_to_csv(batch_data, batch_num)
-        save_progress(total_athletes)
+        save_batch(batch_data, batch_num)
+        save_progress(progress_conn, [athlete['athlete_id'] for athlete in batch_data], batch_num)
+    progress_conn.close()
 
     logger.info(f"\n{'='*60}")
     logger.info(f"COMPLETE!")
@@ -4,25 +4,57 @@ Run with: python scrape_by_letter.py A
 Or: python scrape_by_letter.py A 0 500  (for first 500 of letter A)
 """
 
-import requests
 import json
 import csv
 import os
 import re
 import sys
-import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
 from typing import Optional, Dict, List, Tuple
 import logging
 
+from fetching import RateLimiter, fetch_in_order, make_parse_pool, make_session, throttled_request
+
 # Configuration
 OUTPUT_DIR = "scraped_data"
 SEARCH_HTML_DIR = "athlete_search_html"
-DELAY_BETWEEN_REQUESTS = 0.2  # seconds
+DELAY_BETWEEN_REQUESTS = 0.2  # seconds, minimum spacing across all fetch threads
+FETCH_WORKERS = 8  # concurrent athlete page fetches
+PARSE_WORKERS = os.cpu_count() or 1  # processes parsing fetched pages
+IO_BUFFER_SIZE = 1 << 20  # 1 MiB write buffers for the letter CSV files
+
+ATHLETE_FIELDS = ['id', 'name', 'birth_date']
+RESULT_FIELDS = [
+    'athlete_id', 'event', 'is_outdoor', 'year', 'age',
+    'result', 'wind', 'placement', 'club', 'date',
+    'venue', 'competition', 'competition_key', 'is_approved', 'rejection_reason'
+]
+# One parsed result, already in RESULT_FIELDS order for csv.writer
+ResultRow = namedtuple('ResultRow', RESULT_FIELDS)
+
+# Section/event headers, h4 markers and result tables; an XPath union
+# returns them in document order
+CONTEXT_ELEMENTS = etree.XPath(
+    "//div[@id='header2'] | //div[@id='eventheader'] | //h4 | //table"
+)
+
+# Precompiled patterns for the per-result parsing helpers
+BIRTH_RE = re.compile(r'(\d{2})\.(\d{2})\.(\d{4})')
+YEAR_AGE_RE = re.compile(r'(\d{4})\s*\((\d+)\)')
+YEAR_RE = re.compile(r'(\d{4})')
+RESULT_WIND_RE = re.compile(r'(.+?)\(([+-]?\d+[,.]?\d*)\)$')
+ATHLETE_LINK_RE = re.compile(r'showathl=(\d+)[^>]*>([^<]+)')
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# One pooled session and rate limiter shared by all fetch threads
+SESSION = make_session(FETCH_WORKERS)
+rate_limiter = RateLimiter(DELAY_BETWEEN_REQUESTS)
+
 # Setup logging
 def setup_logging(letter: str):
     log_file = os.path.join(OUTPUT_DIR, f"scrape_{letter}.log")
@@ -39,7 +71,7 @@ def setup_logging(letter: str):
 
 
 def fetch_athlete_results(athlete_id: int) -> str:
-    """Fetch ALL results for an athlete"""
+    """Fetch ALL results for an athlete (throttling and retries are handled by throttled_request)"""
     url = "https://www.minfriidrettsstatistikk.info/php/UtoverStatistikk.php"
 
     data = {
@@ -47,12 +79,9 @@ def fetch_athlete_results(athlete_id: int) -> str:
         "type": "RES"
     }
 
-    headers = {
-        "Content-Type": "application/x-www-form-urlencoded",
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
-    }
-
-    response = requests.post(url, data=data, headers=headers, timeout=30)
+    response = throttled_request(SESSION, rate_limiter, 'POST', url, data=data, timeout=30)
+    # An error page would parse as an empty athlete and be checkpointed
+    response.raise_for_status()
     response.encoding = 'utf-8'
 
     return response.text
@@ -82,7 +111,7 @@ def parse_birth_date(birth_str: str) -> Optional[str]:
     if not birth_str:
         return None
     try:
-        match = re.search(r'(\d{2})\.(\d{2})\.(\d{4})', birth_str)
+        match = BIRTH_RE.search(birth_str)
         if match:
             day, month, year = match.groups()
             return f"{year}-{month}-{day}"
@@ -96,10 +125,11 @@ def parse_year_age(year_age_str: str) -> Tuple[Optional[int], Optional[int]]:
     if not year_age_str:
         return None, None
     try:
-        match = re.match(r'(\d{4})\s*\((\d+)\)', year_age_str.strip())
+        year_age_str = year_age_str.strip()
+        match = YEAR_AGE_RE.match(year_age_str)
         if match:
             return int(match.group(1)), int(match.group(2))
-        match = re.match(r'(\d{4})', year_age_str.strip())
+        match = YEAR_RE.match(year_age_str)
         if match:
             return int(match.group(1)), None
     except:
@@ -113,7 +143,7 @@ def parse_result_wind(result_str: str) -> Tuple[str, Optional[str]]:
         return '', None
 
     result_str = result_str.strip()
-    match = re.match(r'(.+?)\(([+-]?\d+[,.]?\d*)\)$', result_str)
+    match = RESULT_WIND_RE.match(result_str)
     if match:
         return match.group(1), match.group(2)
 
@@ -122,8 +152,6 @@ def parse_result_wind(result_str: str) -> Tuple[str, Optional[str]]:
 
 def parse_athlete_page(html: str, athlete_id: int) -> Dict:
     """Parse athlete page HTML and extract all data"""
-    soup = BeautifulSoup(html, 'html.parser')
-
     data = {
         'athlete_id': athlete_id,
         'name': None,
@@ -131,16 +159,22 @@ def parse_athlete_page(html: str, athlete_id: int) -> Dict:
         'results': []
     }
 
+    # Unknown IDs return a bare page without the athlete header
+    if '<div id="athlete">' not in html:
+        return data
+
+    tree = lxml.html.fromstring(html)
+
     # Extract athlete name
-    athlete_div = soup.find('div', id='athlete')
-    if athlete_div:
-        name_tag = athlete_div.find('h2')
-        if name_tag:
-            data['name'] = name_tag.get_text(strip=True)
+    athlete_div = tree.find(".//div[@id='athlete']")
+    if athlete_div is not None:
+        name_tag = athlete_div.find('.//h2')
+        if name_tag is not None:
+            data['name'] = name_tag.text_content().strip()
 
-        birth_tag = athlete_div.find('h3')
-        if birth_tag:
-            data['birth_date'] = parse_birth_date(birth_tag.get_text())
+        birth_tag = athlete_div.find('.//h3')
+        if birth_tag is not None:
+            data['birth_date'] = parse_birth_date(birth_tag.text_content())
 
     if not data['name']:
         return data
@@ -150,73 +184,61 @@ def parse_athlete_page(html: str, athlete_id: int) -> Dict:
     current_event = None
     is_approved_section = True
 
-    # Process all elements
-    for element in soup.find_all(['div', 'table', 'h4']):
-        if element.name == 'div' and element.get('id') == 'header2':
-            h2 = element.find('h2')
-            if h2:
-                text = h2.get_text(strip=True)
+    # Process the context elements in document order
+    for element in CONTEXT_ELEMENTS(tree):
+        tag = element.tag
+        if tag == 'div' and element.get('id') == 'header2':
+            h2 = element.find('.//h2')
+            if h2 is not None:
+                text = h2.text_content().strip()
                 if 'UTENDØRS' in text:
                     current_section = 'outdoor'
                 elif 'INNENDØRS' in text:
                     current_section = 'indoor'
 
-        elif element.name == 'div' and element.get('id') == 'eventheader':
-            h3 = element.find('h3')
-            if h3:
-                current_event = h3.get_text(strip=True)
+        elif tag == 'div':
+            h3 = element.find('.//h3')
+            if h3 is not None:
+                current_event = h3.text_content().strip()
                 is_approved_section = True
 
-        elif element.name == 'h4':
-            text = element.get_text(strip=True)
+        elif tag == 'h4':
+            text = element.text_content().strip()
             if 'Ikke godkjente' in text:
                 is_approved_section = False
 
-        elif element.name == 'table' and current_event and current_section:
-            rows = element.find_all('tr')
+        elif tag == 'table' and current_event and current_section:
+            rows = element.iter('tr')
 
             for row in rows:
-                cells = row.find_all('td')
+                cells = list(row.iter('td'))
                 if not cells or len(cells) < 6:
                     continue
 
-                year, age = parse_year_age(cells[0].get_text())
-                result_raw = cells[1].get_text(strip=True)
+                year, age = parse_year_age(cells[0].text_content())
+                result_raw = cells[1].text_content().strip()
                 result, wind = parse_result_wind(result_raw)
-                placement = cells[2].get_text(strip=True)
-                club = cells[3].get_text(strip=True)
-                date_str = cells[4].get_text(strip=True)
+                placement = cells[2].text_content().strip()
+                club = cells[3].text_content().strip()
+                date_str = cells[4].text_content().strip()
                 date = parse_date(date_str)
 
                 location_cell = cells[5]
                 venue_full = location_cell.get('title', '')
-                competition_name = location_cell.get_text(strip=True)
+                competition_name = location_cell.text_content().strip()
 
                 rejection_reason = None
                 if len(cells) >= 7 and not is_approved_section:
-                    rejection_reason = cells[6].get_text(strip=True)
+                    rejection_reason = cells[6].text_content().strip()
 
                 # Generate a competition key for grouping by meet
                 comp_key = f"{date}|{venue_full}|{competition_name}" if date and venue_full else None
 
-                result_data = {
-                    'event': current_event,
-                    'is_outdoor': current_section == 'outdoor',
-                    'year': year,
-                    'age': age,
-                    'result': result,
-                    'wind': wind,
-                    'placement': placement,
-                    'club': club,
-                    'date': date,
-                    'venue': venue_full,
-                    'competition': competition_name,
-                    'competition_key': comp_key,  # For grouping by meet
-                    'is_approved': is_approved_section,
-                    'rejection_reason': rejection_reason
-                }
-
-                data['results'].append(result_data)
+                data['results'].append(ResultRow(
+                    athlete_id, current_event, current_section == 'outdoor', year, age,
+                    result, wind, placement, club, date,
+                    venue_full, competition_name, comp_key, is_approved_section, rejection_reason
+                ))
 
     return data
 
@@ -232,8 +254,7 @@ def get_athletes_for_letter(letter: str) -> List[Tuple[int, str]]:
         html = f.read()
 
     # Extract athlete IDs and names
-    pattern = r'showathl=(\d+)[^>]*>([^<]+)'
-    matches = re.findall(pattern, html)
+    matches = ATHLETE_LINK_RE.findall(html)
 
     return [(int(aid), name.strip()) for aid, name in matches]
 
@@ -260,6 +281,32 @@ def save_progress(letter: str, index: int, total: int):
         }, f, indent=2)
 
 
+def fetch_athlete_data(athlete_id: int,
+                       parse_pool: Optional[ProcessPoolExecutor] = None) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Fetch and parse one athlete page; runs in the fetch worker threads.
+    With a parse_pool the page is parsed in a worker process instead of under the GIL.
+    """
+    try:
+        html = fetch_athlete_results(athlete_id)
+        if parse_pool is not None:
+            return parse_pool.submit(parse_athlete_page, html, athlete_id).result(), None
+        return parse_athlete_page(html, athlete_id), None
+    except Exception as e:
+        return None, str(e)
+
+
+def fetch_athletes_concurrently(athlete_ids: List[int]):
+    """
+    Yield (data, error) in input order while the pages are fetched by
+    FETCH_WORKERS threads and parsed by PARSE_WORKERS processes. Only a bounded
+    window is in flight, so the checkpointed index stays in step with what has
+    been written.
+    """
+    with make_parse_pool(PARSE_WORKERS) as parse_pool:
+        yield from fetch_in_order(fetch_athlete_data, athlete_ids, FETCH_WORKERS, parse_pool)
+
+
 def scrape_letter(letter: str, start_idx: int = None, end_idx: int = None):
     """Scrape all athletes for a given letter"""
     logger = setup_logging(letter)
@@ -292,45 +339,37 @@ def scrape_letter(letter: str, start_idx: int = None, end_idx: int = None):
     results_file = os.path.join(OUTPUT_DIR, f"results_{letter}{batch_suffix}.csv")
 
     # Open CSV files
-    athletes_csv = open(athletes_file, 'w', newline='', encoding='utf-8')
-    results_csv = open(results_file, 'w', newline='', encoding='utf-8')
+    athletes_csv = open(athletes_file, 'w', newline='', encoding='utf-8', buffering=IO_BUFFER_SIZE)
+    results_csv = open(results_file, 'w', newline='', encoding='utf-8', buffering=IO_BUFFER_SIZE)
 
-    athletes_writer = csv.DictWriter(athletes_csv, fieldnames=['id', 'name', 'birth_date'])
-    athletes_writer.writeheader()
+    athletes_writer = csv.writer(athletes_csv)
+    athletes_writer.writerow(ATHLETE_FIELDS)
 
-    results_fieldnames = [
-        'athlete_id', 'event', 'is_outdoor', 'year', 'age',
-        'result', 'wind', 'placement', 'club', 'date',
-        'venue', 'competition', 'competition_key', 'is_approved', 'rejection_reason'
-    ]
-    results_writer = csv.DictWriter(results_csv, fieldnames=results_fieldnames)
-    results_writer.writeheader()
+    results_writer = csv.writer(results_csv)
+    results_writer.writerow(RESULT_FIELDS)
 
     # Process athletes
     total_results = 0
     processed = 0
     errors = 0
 
-    for i in range(start_idx, end_idx):
+    # Pages are fetched and parsed ahead by the worker threads and processes;
+    # all file writes stay on this thread
+    fetched = fetch_athletes_concurrently([athlete_id for athlete_id, _ in athletes[start_idx:end_idx]])
+
+    for i, (data, error) in zip(range(start_idx, end_idx), fetched):
         athlete_id, athlete_name = athletes[i]
 
         try:
-            html = fetch_athlete_results(athlete_id)
-            data = parse_athlete_page(html, athlete_id)
+            if error:
+                raise RuntimeError(error)
 
             # Write athlete
             if data['name']:
-                athletes_writer.writerow({
-                    'id': data['athlete_id'],
-                    'name': data['name'],
-                    'birth_date': data['birth_date']
-                })
+                athletes_writer.writerow((data['athlete_id'], data['name'], data['birth_date']))
 
                 # Write results
-                for result in data['results']:
-                    row = {'athlete_id': data['athlete_id']}
-                    row.update(result)
-                    results_writer.writerow(row)
+                results_writer.writerows(data['results'])
 
                 total_results += len(data['results'])
 
@@ -341,16 +380,12 @@ def scrape_letter(letter: str, start_idx: int = None, end_idx: int = None):
                 progress = ((i - start_idx + 1) / (end_idx - start_idx)) * 100
                 logger.info(f"Progress: {i + 1}/{end_idx} ({progress:.1f}%) - {data['name'] or 'empty'} - {len(data['results'])} results")
 
-                # Flush files periodically
+            # Save checkpoint every 100 athletes, once the rows before it are on disk
+            if (i + 1) % 100 == 0:
                 athletes_csv.flush()
                 results_csv.flush()
-
-            # Save checkpoint every 100 athletes
-            if (i + 1) % 100 == 0:
                 save_progress(letter, i + 1, total)
 
-            time.sleep(DELAY_BETWEEN_REQUESTS)
-
         except Exception as e:
             logger.error(f"Error processing athlete {athlete_id} ({athlete_name}): {e}")
             errors += 1
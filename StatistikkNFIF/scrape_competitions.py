@@ -13,11 +13,9 @@ Usage:
     python scrape_competitions.py status            # Show progress
 """
 
-import requests
 import sqlite3
 import re
 import sys
-import time
 import json
 import os
 from bs4 import BeautifulSoup
@@ -25,10 +23,24 @@ from datetime import datetime
 from typing import Optional, Dict, List, Set, Tuple
 import logging
 
+from fetching import RateLimiter, make_session, throttled_request
+
 # Configuration
 DB_PATH = "athletics_stats.db"
-DELAY_BETWEEN_REQUESTS = 0.3
+DELAY_BETWEEN_REQUESTS = 0.3  # seconds, minimum spacing between requests
 MAX_RETRIES = 3
+DISCOVERY_COMMIT_EVERY = 100  # rankings pages per discovery transaction
+RETRY_DELAY = 2  # seconds before the first retry, doubled for each further one
+
+# Precompiled patterns for the rankings/results parsing helpers
+COMP_ID_RE = re.compile(r'posttoresultlist\((\d+)\)')
+RESULT_WIND_RE = re.compile(r'(.+?)\(([+-]?\d+[,.]?\d*)\)\s*$')
+NAME_YEAR_RE = re.compile(r'(.+?)\((\d{4})\)$')
+NAME_NO_YEAR_RE = re.compile(r'(.+?)\(0+\)$')
+
+# One keep-alive session for every page fetch (MAX_RETRIES attempts in total)
+SESSION = make_session(retries=MAX_RETRIES, retry_delay=RETRY_DELAY)
+rate_limiter = RateLimiter(DELAY_BETWEEN_REQUESTS)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -50,6 +62,10 @@ def init_database():
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
 
+    # WAL is stored in the database file, so every later connection uses it;
+    # commits then append to the log instead of rewriting a rollback journal
+    cursor.execute("PRAGMA journal_mode=WAL")
+
     cursor.executescript("""
         -- Competitions table with source system IDs
         CREATE TABLE IF NOT EXISTS competitions (
@@ -149,7 +165,7 @@ def init_database():
 # =====================================================
 
 def fetch_rankings_page(showclass: int, showevent: int, showseason: int, outdoor: str) -> str:
-    """Fetch a rankings page from LandsStatistikk.php"""
+    """Fetch a rankings page from LandsStatistikk.php (throttling and retries are handled by throttled_request)"""
     url = "https://www.minfriidrettsstatistikk.info/php/LandsStatistikk.php"
     params = {
         'showclass': showclass,
@@ -159,28 +175,16 @@ def fetch_rankings_page(showclass: int, showevent: int, showseason: int, outdoor
         'showclub': 0
     }
 
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
-    }
-
-    for attempt in range(MAX_RETRIES):
-        try:
-            response = requests.get(url, params=params, headers=headers, timeout=30)
-            response.encoding = 'utf-8'
-            return response.text
-        except requests.RequestException as e:
-            if attempt < MAX_RETRIES - 1:
-                time.sleep(2)
-            else:
-                raise
-    return ""
+    response = throttled_request(SESSION, rate_limiter, 'GET', url, retries=MAX_RETRIES,
+                                 retry_delay=RETRY_DELAY, params=params, timeout=30)
+    response.encoding = 'utf-8'
+    return response.text
 
 
 def extract_competition_ids(html: str) -> Set[int]:
     """Extract competition IDs from rankings page HTML"""
     # Find all posttoresultlist(XXXXXX) calls
-    pattern = r'posttoresultlist\((\d+)\)'
-    matches = re.findall(pattern, html)
+    matches = COMP_ID_RE.findall(html)
     return set(int(m) for m in matches)
 
 
@@ -227,6 +231,9 @@ def discover_all_competition_ids():
     Iterate through all event/class/year combinations to discover competition IDs.
     """
     conn = sqlite3.connect(DB_PATH)
+    # In WAL mode a NORMAL commit does not fsync, and losing the last pages'
+    # progress in a power cut only means fetching them again
+    conn.execute("PRAGMA synchronous=NORMAL")
     cursor = conn.cursor()
 
     events, classes, years = get_event_class_ranges()
@@ -236,52 +243,54 @@ def discover_all_competition_ids():
 
     all_competition_ids = set()
     processed = 0
+    uncommitted = 0
 
-    for outdoor in ['Y', 'N']:
-        for year in reversed(years):  # Start with recent years
-            for event in events:
-                for cls in classes:
-                    # Check if already processed
-                    cursor.execute("""
-                        SELECT 1 FROM discovery_progress
-                        WHERE showclass=? AND showevent=? AND showseason=? AND outdoor=?
-                    """, (cls, event, year, outdoor))
-
-                    if cursor.fetchone():
-                        processed += 1
-                        continue
-
-                    try:
-                        html = fetch_rankings_page(cls, event, year, outdoor)
-                        comp_ids = extract_competition_ids(html)
+    # Combinations already scanned by earlier runs
+    cursor.execute("SELECT showclass, showevent, showseason, outdoor FROM discovery_progress")
+    done = set(cursor.fetchall())
 
-                        # Store discovered IDs
-                        for comp_id in comp_ids:
-                            cursor.execute("""
+    try:
+        for outdoor in ['Y', 'N']:
+            for year in reversed(years):  # Start with recent years
+                for event in events:
+                    for cls in classes:
+                        if (cls, event, year, outdoor) in done:
+                            processed += 1
+                            continue
+
+                        try:
+                            html = fetch_rankings_page(cls, event, year, outdoor)
+                            comp_ids = extract_competition_ids(html)
+
+                            # Store discovered IDs
+                            cursor.executemany("""
                                 INSERT OR IGNORE INTO discovered_competitions (competition_id)
                                 VALUES (?)
-                            """, (comp_id,))
-                            all_competition_ids.add(comp_id)
+                            """, [(comp_id,) for comp_id in comp_ids])
+                            all_competition_ids.update(comp_ids)
 
-                        # Mark as processed
-                        cursor.execute("""
-                            INSERT INTO discovery_progress (showclass, showevent, showseason, outdoor, competitions_found)
-                            VALUES (?, ?, ?, ?, ?)
-                        """, (cls, event, year, outdoor, len(comp_ids)))
-
-                        conn.commit()
-                        processed += 1
-
-                        if processed % 100 == 0:
-                            logger.info(f"Progress: {processed}/{total_combinations} - Found {len(all_competition_ids)} unique competitions")
-
-                        time.sleep(DELAY_BETWEEN_REQUESTS)
-
-                    except Exception as e:
-                        logger.error(f"Error fetching class={cls} event={event} year={year}: {e}")
-                        continue
-
-    conn.close()
+                            # Mark as processed
+                            cursor.execute("""
+                                INSERT INTO discovery_progress (showclass, showevent, showseason, outdoor, competitions_found)
+                                VALUES (?, ?, ?, ?, ?)
+                            """, (cls, event, year, outdoor, len(comp_ids)))
+
+                            processed += 1
+                            uncommitted += 1
+                            if uncommitted >= DISCOVERY_COMMIT_EVERY:
+                                conn.commit()
+                                uncommitted = 0
+
+                            if processed % 100 == 0:
+                                logger.info(f"Progress: {processed}/{total_combinations} - Found {len(all_competition_ids)} unique competitions")
+
+                        except Exception as e:
+                            logger.error(f"Error fetching class={cls} event={event} year={year}: {e}")
+                            continue
+    finally:
+        # Keep the pages scanned since the last commit, also on Ctrl+C
+        conn.commit()
+        conn.close()
     logger.info(f"Discovery complete. Found {len(all_competition_ids)} unique competition IDs")
     return all_competition_ids
 
@@ -310,14 +319,11 @@ def quick_discover(years: List[int] = None, events: List[int] = None):
                         html = fetch_rankings_page(cls, event, year, outdoor)
                         comp_ids = extract_competition_ids(html)
 
-                        for comp_id in comp_ids:
-                            cursor.execute("""
-                                INSERT OR IGNORE INTO discovered_competitions (competition_id)
-                                VALUES (?)
-                            """, (comp_id,))
-                            all_comp_ids.add(comp_id)
-
-                        time.sleep(DELAY_BETWEEN_REQUESTS)
+                        cursor.executemany("""
+                            INSERT OR IGNORE INTO discovered_competitions (competition_id)
+                            VALUES (?)
+                        """, [(comp_id,) for comp_id in comp_ids])
+                        all_comp_ids.update(comp_ids)
 
                     except Exception as e:
                         logger.error(f"Error: {e}")
@@ -334,26 +340,15 @@ def quick_discover(years: List[int] = None, events: List[int] = None):
 # =====================================================
 
 def fetch_competition_results(competition_id: int) -> str:
-    """Fetch full results for a competition"""
+    """Fetch full results for a competition (throttling and retries are handled by throttled_request)"""
     url = "https://www.minfriidrettsstatistikk.info/php/StevneResultater.php"
 
     data = {"competition": competition_id}
-    headers = {
-        "Content-Type": "application/x-www-form-urlencoded",
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
-    }
 
-    for attempt in range(MAX_RETRIES):
-        try:
-            response = requests.post(url, data=data, headers=headers, timeout=30)
-            response.encoding = 'utf-8'
-            return response.text
-        except requests.RequestException as e:
-            if attempt < MAX_RETRIES - 1:
-                time.sleep(2)
-            else:
-                raise
-    return ""
+    response = throttled_request(SESSION, rate_limiter, 'POST', url, retries=MAX_RETRIES,
+                                 retry_delay=RETRY_DELAY, data=data, timeout=30)
+    response.encoding = 'utf-8'
+    return response.text
 
 
 def parse_date_range(date_str: str) -> Tuple[Optional[str], Optional[str]]:
@@ -390,7 +385,7 @@ def parse_result_wind(result_str: str) -> Tuple[str, Optional[str]]:
         return '', None
 
     result_str = result_str.strip()
-    match = re.match(r'(.+?)\(([+-]?\d+[,.]?\d*)\)\s*$', result_str)
+    match = RESULT_WIND_RE.match(result_str)
     if match:
         return match.group(1).strip(), match.group(2)
 
@@ -402,16 +397,17 @@ def parse_athlete_name_year(name_str: str) -> Tuple[str, Optional[int]]:
     if not name_str:
         return '', None
 
-    match = re.match(r'(.+?)\((\d{4})\)$', name_str.strip())
+    name_str = name_str.strip()
+    match = NAME_YEAR_RE.match(name_str)
     if match:
         return match.group(1).strip(), int(match.group(2))
 
     # Handle (0000) for unknown birth year
-    match = re.match(r'(.+?)\(0+\)$', name_str.strip())
+    match = NAME_NO_YEAR_RE.match(name_str)
     if match:
         return match.group(1).strip(), None
 
-    return name_str.strip(), None
+    return name_str, None
 
 
 def parse_competition_page(html: str, competition_id: int) -> Dict:
@@ -637,8 +633,6 @@ def scrape_all_competitions():
         if (i + 1) % 50 == 0:
             logger.info(f"Progress: {i + 1}/{len(comp_ids)}")
 
-        time.sleep(DELAY_BETWEEN_REQUESTS)
-
 
 def show_status():
     """Show scraping status"""
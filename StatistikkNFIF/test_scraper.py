@@ -25,13 +25,14 @@ def main():
 
         print(f"  Name: {data['name']}")
         print(f"  Birth date: {data['birth_date']}")
-        print(f"  Total results: {len(data['results'])}")
+        results = data['results']
+        print(f"  Total results: {len(results)}")
 
-        if data['results']:
+        if results:
             # Count by event
             events = {}
-            for r in data['results']:
-                events[r['event']] = events.get(r['event'], 0) + 1
+            for event in results.event:
+                events[event] = events.get(event, 0) + 1
 
             print(f"  Events: {len(events)}")
             for event, count in sorted(events.items(), key=lambda x: -x[1])[:5]:
@@ -39,15 +40,15 @@ def main():
 
             # Show sample results
             print(f"\n  Sample results:")
-            for r in data['results'][:3]:
-                print(f"    {r['event']}: {r['result']} ({r['wind'] or 'no wind'}) - {r['date']} - {r['placement']}")
+            for i in range(min(3, len(results))):
+                print(f"    {results.event[i]}: {results.result[i]} ({results.wind[i] or 'no wind'}) - {results.date[i]} - {results.placement[i]}")
 
             # Check for disqualified
-            disqualified = [r for r in data['results'] if not r['is_approved']]
+            disqualified = [i for i, approved in enumerate(results.is_approved) if not approved]
             if disqualified:
                 print(f"\n  Disqualified results: {len(disqualified)}")
-                for r in disqualified[:2]:
-                    print(f"    {r['event']}: {r['result']} - {r['rejection_reason']}")
+                for i in disqualified[:2]:
+                    print(f"    {results.event[i]}: {results.result[i]} - {results.rejection_reason[i]}")
 
         print("-" * 60)
 
@@ -37,6 +37,8 @@ import sys
 import time
 import hashlib
 from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
 from datetime import datetime
 from typing import Optional, Dict, List, Set, Tuple
 import logging
@@ -49,6 +51,12 @@ DELAY_BETWEEN_REQUESTS = 0.25
 MAX_RETRIES = 3
 COMPETITION_LINK_CUTOFF_YEAR = 2011  # Competition links exist from this year
 
+# Section/event headers, h4 markers and result tables of an athlete page; an
+# XPath union returns them in document order
+ATHLETE_PAGE_ELEMENTS = etree.XPath(
+    "//div[@id='header2'] | //div[@id='eventheader'] | //h4 | //table"
+)
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -732,21 +740,25 @@ def scrape_athlete(conn, source_id: int) -> Tuple[int, int]:
     url = "https://www.minfriidrettsstatistikk.info/php/UtoverStatistikk.php"
     html = make_request(url, method='POST', data={'athlete': source_id, 'type': 'RES'})
 
-    soup = BeautifulSoup(html, 'html.parser')
+    # Unknown IDs return a bare page without the athlete header
+    if '<div id="athlete">' not in html:
+        return 0, 0
+
+    tree = lxml.html.fromstring(html)
 
     # Parse athlete info
     athlete_name = None
     birth_date = None
 
-    athlete_div = soup.find('div', id='athlete')
-    if athlete_div:
-        name_tag = athlete_div.find('h2')
-        if name_tag:
-            athlete_name = name_tag.get_text(strip=True)
+    athlete_div = tree.find(".//div[@id='athlete']")
+    if athlete_div is not None:
+        name_tag = athlete_div.find('.//h2')
+        if name_tag is not None:
+            athlete_name = name_tag.text_content().strip()
 
-        birth_tag = athlete_div.find('h3')
-        if birth_tag:
-            birth_text = birth_tag.get_text(strip=True)
+        birth_tag = athlete_div.find('.//h3')
+        if birth_tag is not None:
+            birth_text = birth_tag.text_content().strip()
             match = re.search(r'(\d{2})\.(\d{2})\.(\d{4})', birth_text)
             if match:
                 day, month, year = match.groups()
@@ -790,44 +802,45 @@ def scrape_athlete(conn, source_id: int) -> Tuple[int, int]:
     new_results = 0
     total_results = 0
 
-    for element in soup.find_all(['div', 'table', 'h4']):
-        if element.name == 'div' and element.get('id') == 'header2':
-            h2 = element.find('h2')
-            if h2:
-                text = h2.get_text(strip=True)
+    for element in ATHLETE_PAGE_ELEMENTS(tree):
+        tag = element.tag
+        if tag == 'div' and element.get('id') == 'header2':
+            h2 = element.find('.//h2')
+            if h2 is not None:
+                text = h2.text_content().strip()
                 current_section = 'outdoor' if 'UTENDØRS' in text else 'indoor'
 
-        elif element.name == 'div' and element.get('id') == 'eventheader':
-            h3 = element.find('h3')
-            if h3:
-                current_event = h3.get_text(strip=True)
+        elif tag == 'div' and element.get('id') == 'eventheader':
+            h3 = element.find('.//h3')
+            if h3 is not None:
+                current_event = h3.text_content().strip()
                 is_approved_section = True
 
-        elif element.name == 'h4':
-            if 'Ikke godkjente' in element.get_text(strip=True):
+        elif tag == 'h4':
+            if 'Ikke godkjente' in element.text_content():
                 is_approved_section = False
 
-        elif element.name == 'table' and current_event and current_section:
-            for row in element.find_all('tr'):
-                cells = row.find_all('td')
+        elif tag == 'table' and current_event and current_section:
+            for row in element.iter('tr'):
+                cells = list(row.iter('td'))
                 if not cells or len(cells) < 6:
                     continue
 
-                year, age = parse_year_age(cells[0].get_text())
-                result_raw = cells[1].get_text(strip=True)
+                year, age = parse_year_age(cells[0].text_content())
+                result_raw = cells[1].text_content().strip()
                 result, wind = parse_result_wind(result_raw)
-                placement = cells[2].get_text(strip=True)
-                club = cells[3].get_text(strip=True)
-                date_str = cells[4].get_text(strip=True)
+                placement = cells[2].text_content().strip()
+                club = cells[3].text_content().strip()
+                date_str = cells[4].text_content().strip()
                 date = parse_date(date_str, 'short')
 
                 location_cell = cells[5]
                 venue = location_cell.get('title', '').strip()
-                competition_name = location_cell.get_text(strip=True)
+                competition_name = location_cell.text_content().strip()
 
                 rejection_reason = None
                 if len(cells) >= 7 and not is_approved_section:
-                    rejection_reason = cells[6].get_text(strip=True)
+                    rejection_reason = cells[6].text_content().strip()
 
                 if not result:
                     continue